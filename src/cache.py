@@ -0,0 +1,164 @@
+"""
+Cache module for DocuPR.
+
+This module provides on-disk caches so that reruns don't repeat work: GitHub
+responses are revalidated with ETags instead of downloaded again, and OpenAI
+responses are reused for identical prompts.
+"""
+
+import hashlib
+import logging
+import os
+import sqlite3
+import time
+from typing import Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Cached OpenAI responses are reused for 30 days
+ANALYSIS_CACHE_TTL = 30 * 24 * 60 * 60
+
+class ResponseCache:
+    """
+    SQLite-backed store of HTTP response bodies and their ETags.
+    """
+    
+    def __init__(self, path: str):
+        """
+        Initialize the response cache.
+        
+        Args:
+            path (str): Path to the SQLite database file
+        """
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+            
+        self.path = path
+        self._conn = sqlite3.connect(path)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS responses ("
+            "url TEXT PRIMARY KEY, etag TEXT NOT NULL, body TEXT NOT NULL)"
+        )
+        self._conn.commit()
+        
+    def get(self, url: str) -> Optional[Tuple[str, str]]:
+        """
+        Look up a cached response.
+        
+        Args:
+            url (str): URL the response was fetched from
+            
+        Returns:
+            Optional[Tuple[str, str]]: The (etag, body) pair, or None if not cached
+        """
+        row = self._conn.execute(
+            "SELECT etag, body FROM responses WHERE url = ?", (url,)
+        ).fetchone()
+        return (row[0], row[1]) if row else None
+        
+    def set(self, url: str, etag: str, body: str) -> None:
+        """
+        Store a response and its ETag.
+        
+        Args:
+            url (str): URL the response was fetched from
+            etag (str): ETag header returned with the response
+            body (str): Response body
+        """
+        self._conn.execute(
+            "INSERT OR REPLACE INTO responses (url, etag, body) VALUES (?, ?, ?)",
+            (url, etag, body)
+        )
+        self._conn.commit()
+        
+    def close(self) -> None:
+        """
+        Close the underlying database connection.
+        """
+        self._conn.close()
+
+class AnalysisCache:
+    """
+    SQLite-backed store of OpenAI responses keyed by a hash of the prompt.
+    """
+    
+    def __init__(self, path: str, ttl: int = ANALYSIS_CACHE_TTL):
+        """
+        Initialize the analysis cache.
+        
+        Args:
+            path (str): Path to the SQLite database file
+            ttl (int): Seconds after which a cached response is no longer used
+        """
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+            
+        self.path = path
+        self.ttl = ttl
+        self._conn = sqlite3.connect(path)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS cache ("
+            "key TEXT PRIMARY KEY, response TEXT NOT NULL, ts INTEGER NOT NULL)"
+        )
+        
+        # Drop expired responses so the database doesn't grow without bound
+        self._conn.execute("DELETE FROM cache WHERE ts < ?", (int(time.time()) - ttl,))
+        self._conn.commit()
+        
+    @staticmethod
+    def make_key(model: str, system_prompt: str, user_message: str) -> str:
+        """
+        Build the cache key for a prompt.
+        
+        Args:
+            model (str): Model the prompt is sent to
+            system_prompt (str): The system prompt
+            user_message (str): The user message
+            
+        Returns:
+            str: Hex digest identifying the prompt
+        """
+        # The key only needs to be collision-free, not cryptographically strong
+        digest = hashlib.blake2b(digest_size=16)
+        for part in (model, system_prompt, user_message):
+            digest.update(part.encode("utf-8"))
+            digest.update(b"\0")
+        return digest.hexdigest()
+        
+    def get(self, key: str) -> Optional[str]:
+        """
+        Look up a cached response.
+        
+        Args:
+            key (str): Key from make_key()
+            
+        Returns:
+            Optional[str]: The cached response content, or None if not cached or expired
+        """
+        row = self._conn.execute(
+            "SELECT response FROM cache WHERE key = ? AND ts >= ?",
+            (key, int(time.time()) - self.ttl)
+        ).fetchone()
+        return row[0] if row else None
+        
+    def set(self, key: str, response: str) -> None:
+        """
+        Store a response.
+        
+        Args:
+            key (str): Key from make_key()
+            response (str): Response content returned by OpenAI
+        """
+        self._conn.execute(
+            "INSERT OR REPLACE INTO cache (key, response, ts) VALUES (?, ?, ?)",
+            (key, response, int(time.time()))
+        )
+        self._conn.commit()
+        
+    def close(self) -> None:
+        """
+        Close the underlying database connection.
+        """
+        self._conn.close()
@@ -4,19 +4,15 @@ Command-line interface for DocuPR.
 This module provides the CLI for the DocuPR tool.
 """
 
-import asyncio
 import logging
 import os
 import sys
 from datetime import datetime, timedelta
-from typing import Optional, List, Dict, Any
+from typing import Any, Awaitable, Callable, Dict, List, Optional
 
 import click
 
-from .config import validate_config
-from .github_client import GitHubClient
-from .openai_analyzer import OpenAIAnalyzer
-from .report_generator import ReportGenerator
+from .config import get_cache_config, validate_config
 
 # Configure logging
 logging.basicConfig(
@@ -29,13 +25,49 @@ logging.basicConfig(
 
 logger = logging.getLogger(__name__)
 
+# Maximum number of PRs fetched and analyzed at the same time
+MAX_CONCURRENT_PRS = 8
+
+# Number of retries for transient GitHub failures; the OpenAI client retries
+# its own requests (see OPENAI_MAX_RETRIES)
+MAX_RETRIES = 4
+
+async def _with_retry(coro_factory: Callable[[], Awaitable[Any]], retries: int = MAX_RETRIES) -> Any:
+    """
+    Await a coroutine, retrying transient failures with exponential backoff.
+    
+    Args:
+        coro_factory (Callable[[], Awaitable[Any]]): Creates a fresh coroutine for each attempt
+        retries (int): Number of retries before the error is raised
+        
+    Returns:
+        Any: The result of the coroutine
+    """
+    import asyncio
+    import random
+    
+    import aiohttp
+    
+    for attempt in range(retries + 1):
+        try:
+            return await coro_factory()
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            if attempt == retries:
+                raise
+            # Add jitter so concurrent tasks don't retry in lockstep
+            delay = 2 ** attempt + random.random()
+            logger.warning(f"Transient error ({e}), retrying in {delay:.1f} seconds")
+            await asyncio.sleep(delay)
+
 async def analyze_repository(
     repo_url: str,
     since_date: Optional[datetime] = None,
     release_tag: Optional[str] = None,
     token: Optional[str] = None,
     output_dir: str = ".",
-    json_output: bool = False
+    json_output: bool = False,
+    use_cache: bool = True,
+    use_batch: bool = False
 ) -> str:
     """
     Analyze a GitHub repository and generate a documentation update report.
@@ -46,6 +78,8 @@ async def analyze_repository(
         token (Optional[str]): GitHub OAuth token
         output_dir (str): Directory to save reports to
         json_output (bool): Whether to generate a JSON report
+        use_cache (bool): Whether to reuse cached GitHub and OpenAI responses from previous runs
+        use_batch (bool): Whether to analyze PRs with a single OpenAI Batch API job
         
     Returns:
         str: Path to the generated report
@@ -57,63 +91,122 @@ async def analyze_repository(
             logger.error(f"Configuration error: {error}")
         raise ValueError("Invalid configuration. Please check your .env file.")
     
+    # Import the clients lazily so `--help` doesn't pay for aiohttp and openai
+    import asyncio
+    
+    from .cache import AnalysisCache, ResponseCache
+    from .github_client import GitHubClient
+    from .openai_analyzer import OpenAIAnalyzer
+    from .report_generator import ReportGenerator
+    
     # Initialize clients
-    github_client = GitHubClient(token)
-    openai_analyzer = OpenAIAnalyzer()
+    response_cache = None
+    analysis_cache = None
+    if use_cache:
+        cache_dir = get_cache_config().dir
+        response_cache = ResponseCache(os.path.join(cache_dir, "github.db"))
+        analysis_cache = AnalysisCache(os.path.join(cache_dir, "openai.db"))
+        
+    github_client = GitHubClient(token, cache=response_cache)
+    openai_analyzer = OpenAIAnalyzer(cache=analysis_cache)
     report_generator = ReportGenerator(output_dir)
     
-    # Authenticate with GitHub
-    if not token:
-        token = await github_client.authenticate()
+    try:
+        # Authenticate with GitHub
+        if not token:
+            token = await github_client.authenticate()
     
-    # Get repository
-    logger.info(f"Fetching repository: {repo_url}")
-    repo = github_client.get_repository(repo_url)
+        # Get repository
+        logger.info(f"Fetching repository: {repo_url}")
+        repo = await github_client.get_repository(repo_url)
     
-    # Get release date if not provided
-    if not since_date:
-        if release_tag:
-            logger.info(f"Fetching release date for tag: {release_tag}")
-        else:
-            logger.info("Fetching latest release date")
-            
-        since_date = await github_client.get_release_date(repo, release_tag)
-        
+        # Get release date if not provided
         if not since_date:
-            # Default to 30 days ago if no releases found
-            since_date = datetime.now() - timedelta(days=30)
-            logger.info(f"No releases found, using date from 30 days ago: {since_date}")
-        else:
             if release_tag:
-                logger.info(f"Using release date for tag {release_tag}: {since_date}")
+                logger.info(f"Fetching release date for tag: {release_tag}")
+            else:
+                logger.info("Fetching latest release date")
+            
+            since_date = await github_client.get_release_date(repo, release_tag)
+        
+            if not since_date:
+                # Default to 30 days ago if no releases found
+                since_date = datetime.now() - timedelta(days=30)
+                logger.info(f"No releases found, using date from 30 days ago: {since_date}")
             else:
-                logger.info(f"Using latest release date: {since_date}")
-    
-    # Get PRs since the date
-    logger.info(f"Fetching PRs since {since_date}")
-    prs = await github_client.get_prs_since_date(repo, since_date)
-    logger.info(f"Found {len(prs)} PRs")
-    
-    if not prs:
-        logger.warning("No PRs found since the specified date")
-        return report_generator.generate_report(repo_url, since_date, [])
-    
-    # Analyze PRs
-    logger.info("Analyzing PRs")
-    analysis_results = []
-    
-    for i, pr in enumerate(prs):
-        logger.info(f"Analyzing PR #{pr.number} ({i+1}/{len(prs)})")
-        pr_details = await github_client.get_pr_details(pr)
-        analysis = await openai_analyzer.analyze_pr(pr_details)
-        analysis_results.append(analysis)
-    
-    # Generate report
-    logger.info("Generating report")
-    if json_output:
-        return report_generator.generate_json_report(repo_url, since_date, analysis_results)
-    else:
-        return report_generator.generate_report(repo_url, since_date, analysis_results)
+                if release_tag:
+                    logger.info(f"Using release date for tag {release_tag}: {since_date}")
+                else:
+                    logger.info(f"Using latest release date: {since_date}")
+    
+        # Get PRs since the date
+        logger.info(f"Fetching PRs since {since_date}")
+        prs = await github_client.get_prs_since_date(repo, since_date)
+        logger.info(f"Found {len(prs)} PRs")
+    
+        if not prs:
+            logger.warning("No PRs found since the specified date")
+            return report_generator.generate_report(repo_url, since_date, [])
+    
+        # Analyze PRs concurrently, bounded by a semaphore
+        logger.info("Analyzing PRs")
+        semaphore = asyncio.Semaphore(MAX_CONCURRENT_PRS)
+
+        async def analyze_one(i: int, pr: Dict[str, Any]) -> Dict[str, Any]:
+            async with semaphore:
+                logger.info(f"Analyzing PR #{pr['number']} ({i+1}/{len(prs)})")
+                pr_details = await _with_retry(
+                    lambda: github_client.get_pr_details(pr, pr_metadata.get(pr["number"]))
+                )
+                if use_batch:
+                    # Analyzed together once all PRs are fetched
+                    return pr_details
+                # The OpenAI client retries rate limits and server errors itself
+                return await openai_analyzer.analyze_pr(pr_details)
+
+        # Batch-fetch PR metadata and changed files over GraphQL
+        try:
+            pr_metadata = await github_client.get_pr_metadata(repo, [pr["number"] for pr in prs])
+        except Exception as e:
+            logger.warning(f"Failed to fetch PR metadata via GraphQL, falling back to REST: {e}")
+            pr_metadata = {}
+
+        results = await asyncio.gather(
+            *(analyze_one(i, pr) for i, pr in enumerate(prs)),
+            return_exceptions=True
+        )
+
+        if use_batch:
+            # Submit every fetched PR as one batch job; failed fetches keep their place
+            fetched = [result for result in results if not isinstance(result, BaseException)]
+            logger.info(f"Submitting {len(fetched)} PRs to the OpenAI Batch API")
+            batch_results = iter(await openai_analyzer.analyze_prs_batch(fetched) if fetched else [])
+            results = [
+                result if isinstance(result, BaseException) else next(batch_results)
+                for result in results
+            ]
+
+        # gather preserves input order, so results line up with prs
+        analysis_results = []
+        for pr, result in zip(prs, results):
+            if isinstance(result, BaseException):
+                # Keep the PR in the report instead of dropping it silently
+                logger.error(f"Failed to analyze PR #{pr['number']}: {result}")
+                result = openai_analyzer.error_result(pr, str(result))
+            analysis_results.append(result)
+
+        # Generate report
+        logger.info("Generating report")
+        if json_output:
+            return report_generator.generate_json_report(repo_url, since_date, analysis_results)
+        else:
+            return report_generator.generate_report(repo_url, since_date, analysis_results)
+    finally:
+        await github_client.close()
+        await openai_analyzer.close()
+        if response_cache:
+            response_cache.close()
+            analysis_cache.close()
 
 @click.group()
 def cli():
@@ -144,13 +237,25 @@ def cli():
     is_flag=True, 
     help="Generate a JSON report instead of markdown."
 )
+@click.option(
+    "--no-cache", 
+    is_flag=True, 
+    help="Don't reuse cached GitHub and OpenAI responses from previous runs."
+)
+@click.option(
+    "--batch", 
+    is_flag=True, 
+    help="Analyze PRs with the OpenAI Batch API. Cheaper, but can take up to 24 hours."
+)
 def analyze(
     repo_url: str, 
     since: Optional[str] = None,
     release_tag: Optional[str] = None,
     token: Optional[str] = None,
     output_dir: str = ".",
-    json: bool = False
+    json: bool = False,
+    no_cache: bool = False,
+    batch: bool = False
 ):
     """
     Analyze a GitHub repository and generate a documentation update report.
@@ -167,6 +272,8 @@ def analyze(
             sys.exit(1)
     
     # Run the analysis
+    import asyncio
+    
     try:
         report_path = asyncio.run(
             analyze_repository(
@@ -175,7 +282,9 @@ def analyze(
                 release_tag=release_tag,
                 token=token,
                 output_dir=output_dir,
-                json_output=json
+                json_output=json,
+                use_cache=not no_cache,
+                use_batch=batch
             )
         )
         
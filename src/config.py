@@ -5,7 +5,10 @@ This module loads environment variables and provides configuration settings
 for the GitHub and OpenAI API clients.
 """
 
+import functools
 import os
+import re
+from dataclasses import dataclass
 from typing import Dict, Any, Optional
 from dotenv import load_dotenv
 
@@ -24,6 +27,61 @@ USER_FACING_PATTERNS = [
     "config/*",
 ]
 
+def _glob_to_regex(pattern: str) -> str:
+    """
+    Translate a gitignore-style glob into a regular expression.
+    
+    Unlike fnmatch, `*` and `?` don't match `/`, `**/` matches zero or more
+    directories, and a pattern without a `/` matches the file name in any
+    directory.
+    
+    Args:
+        pattern (str): Glob pattern
+        
+    Returns:
+        str: Regular expression matching the same paths
+    """
+    if "/" not in pattern:
+        pattern = "**/" + pattern
+        
+    parts = []
+    i = 0
+    while i < len(pattern):
+        if pattern.startswith("**/", i):
+            parts.append("(?:[^/]*/)*")
+            i += 3
+        elif pattern.startswith("**", i):
+            parts.append(".*")
+            i += 2
+        elif pattern[i] == "*":
+            parts.append("[^/]*")
+            i += 1
+        elif pattern[i] == "?":
+            parts.append("[^/]")
+            i += 1
+        else:
+            parts.append(re.escape(pattern[i]))
+            i += 1
+    return "".join(parts)
+
+# All user-facing patterns compiled into a single alternation
+_USER_FACING_RE = re.compile("|".join(f"(?:{_glob_to_regex(p)})" for p in USER_FACING_PATTERNS))
+
+# Maximum number of diff characters sent to OpenAI for each PR
+MAX_DIFF_CHARS = 10000
+
+def is_user_facing(path: str) -> bool:
+    """
+    Check whether a changed file matches one of the user-facing patterns.
+    
+    Args:
+        path (str): Path of the changed file, relative to the repository root
+        
+    Returns:
+        bool: True if the file typically indicates a user-facing change
+    """
+    return _USER_FACING_RE.fullmatch(path) is not None
+
 def validate_config() -> Dict[str, Any]:
     """
     Validate that all required configuration variables are set.
@@ -44,30 +102,80 @@ def validate_config() -> Dict[str, Any]:
     
     return errors
 
-def get_openai_config() -> Dict[str, Any]:
+@dataclass(frozen=True)
+class OpenAIConfig:
+    """
+    OpenAI API configuration.
+    """
+    api_key: Optional[str]
+    model: str
+    max_tokens: int
+    temperature: float
+    base_url: str
+    extra_instructions: str
+
+@dataclass(frozen=True)
+class GitHubConfig:
+    """
+    GitHub API configuration.
+    """
+    token: Optional[str]
+    api_url: str
+
+@dataclass(frozen=True)
+class CacheConfig:
+    """
+    Response cache configuration.
+    """
+    dir: str
+
+@functools.lru_cache(maxsize=1)
+def get_openai_config() -> OpenAIConfig:
     """
     Get OpenAI API configuration.
     
+    The environment is read once; call get_openai_config.cache_clear() to
+    pick up changes.
+    
     Returns:
-        Dict[str, Any]: OpenAI configuration dictionary
-    """
-    return {
-        "api_key": os.getenv("OPENAI_API_KEY"),
-        "model": os.getenv("OPENAI_MODEL", "gpt-4-turbo"),
-        "max_tokens": int(os.getenv("OPENAI_MAX_TOKENS", "2000")),
-        "temperature": float(os.getenv("OPENAI_TEMPERATURE", "0.7")),
-        "base_url": os.getenv("OPENAI_API_BASE", "https://api.openai.com/v1"),
-        "extra_instructions": os.getenv("OPENAI_EXTRA_INSTRUCTIONS", ""),
-    }
+        OpenAIConfig: OpenAI configuration
+    """
+    return OpenAIConfig(
+        api_key=os.getenv("OPENAI_API_KEY"),
+        model=os.getenv("OPENAI_MODEL", "gpt-4-turbo"),
+        max_tokens=int(os.getenv("OPENAI_MAX_TOKENS", "2000")),
+        temperature=float(os.getenv("OPENAI_TEMPERATURE", "0.7")),
+        base_url=os.getenv("OPENAI_API_BASE", "https://api.openai.com/v1"),
+        extra_instructions=os.getenv("OPENAI_EXTRA_INSTRUCTIONS", ""),
+    )
 
-def get_github_config() -> Dict[str, Any]:
+@functools.lru_cache(maxsize=1)
+def get_github_config() -> GitHubConfig:
     """
     Get GitHub API configuration.
     
+    The environment is read once; call get_github_config.cache_clear() to
+    pick up changes.
+    
+    Returns:
+        GitHubConfig: GitHub configuration
+    """
+    return GitHubConfig(
+        token=os.getenv("GITHUB_TOKEN"),
+        api_url=os.getenv("GITHUB_API_URL", "https://api.github.com"),
+    )
+
+@functools.lru_cache(maxsize=1)
+def get_cache_config() -> CacheConfig:
+    """
+    Get response cache configuration.
+    
+    The environment is read once; call get_cache_config.cache_clear() to
+    pick up changes.
+    
     Returns:
-        Dict[str, Any]: GitHub configuration dictionary
+        CacheConfig: Cache configuration
     """
-    return {
-        "token": os.getenv("GITHUB_TOKEN"),
-        "api_url": os.getenv("GITHUB_API_URL", "https://api.github.com"),
-    }
+    return CacheConfig(
+        dir=os.path.expanduser(os.getenv("DOCUPR_CACHE_DIR", "~/.cache/docupr")),
+    )
@@ -1,41 +1,114 @@
 """
 GitHub client module for DocuPR.
 
-This module handles GitHub authentication and API interactions.
+This module handles GitHub authentication and API interactions. All requests
+go through one aiohttp session, so no call blocks the event loop.
 """
 
 import asyncio
-import json
+import codecs
 import logging
-import os
-import time
+import re
 from datetime import datetime
-from typing import Dict, List, Optional, Tuple, Any
+from typing import Dict, List, Optional, Any, Tuple
+from urllib.parse import quote, urlencode
 
 import aiohttp
-from github import Github, Auth
-from github.PullRequest import PullRequest
-from github.Repository import Repository
+import orjson
 
-from .config import get_github_config
+from .cache import ResponseCache
+from .config import MAX_DIFF_CHARS, get_github_config
 
 logger = logging.getLogger(__name__)
 
+# Repository URL formats accepted by get_repository(), with an optional .git suffix:
+# https://github.com/owner/repo or github.com/owner/repo, optionally followed by
+# any path within the repository (e.g. /pull/12 or /tree/main)
+_REPO_URL_RE = re.compile(
+    r"^(?:https?://)?(?:www\.)?github\.com/([^/\s]+)/([^/\s]+?)(?:\.git)?(?:/.*)?$"
+)
+# ...or just owner/repo
+_REPO_SHORT_RE = re.compile(r"^(?!(?:www\.)?github\.com/)([^/\s]+)/([^/\s]+?)(?:\.git)?/?$")
+
+# File header line of a unified git diff; captures the post-change path
+_DIFF_PATH_RE = re.compile(r"^diff --git a/.+ b/(.+)$", re.M)
+
+# Number of pull requests fetched per GraphQL query
+GRAPHQL_BATCH_SIZE = 25
+
+# Pull request fields requested for each aliased GraphQL lookup
+_PR_GRAPHQL_FIELDS = """
+    number
+    title
+    body
+    url
+    author { login }
+    mergedAt
+    files(first: 100) { nodes { path } pageInfo { hasNextPage } }
+"""
+
+def parse_repo_url(repo_url: str) -> Tuple[str, str]:
+    """
+    Extract the owner and repository name from a GitHub repository URL.
+    
+    Args:
+        repo_url (str): GitHub repository URL, or owner/repo
+        
+    Returns:
+        Tuple[str, str]: Owner and repository name
+    """
+    repo_url = repo_url.strip()
+    match = _REPO_URL_RE.match(repo_url) or _REPO_SHORT_RE.match(repo_url)
+    if not match:
+        raise ValueError(f"Invalid GitHub repository URL: {repo_url}")
+        
+    return match.group(1), match.group(2)
+
+def _parse_timestamp(value: Optional[str]) -> Optional[datetime]:
+    """
+    Parse an ISO 8601 timestamp as returned by the GitHub API.
+    
+    Args:
+        value (Optional[str]): Timestamp such as "2023-01-01T00:00:00Z"
+        
+    Returns:
+        Optional[datetime]: Timezone-aware datetime, or None if value is empty
+    """
+    if not value:
+        return None
+    return datetime.fromisoformat(value.replace("Z", "+00:00"))
+
+def _raise_if_transient(resp: aiohttp.ClientResponse) -> None:
+    """
+    Raise aiohttp.ClientResponseError for responses worth retrying.
+    
+    Rate limiting (429) and server errors (5xx) usually clear up on their own,
+    so they surface as aiohttp errors that the CLI's retry wrapper catches.
+    Other failures are left to the caller.
+    
+    Args:
+        resp (aiohttp.ClientResponse): Response to check
+    """
+    if resp.status == 429 or resp.status >= 500:
+        resp.raise_for_status()
+
 class GitHubClient:
     """
     Client for interacting with the GitHub API.
     """
     
-    def __init__(self, token: Optional[str] = None):
+    def __init__(self, token: Optional[str] = None, cache: Optional[ResponseCache] = None):
         """
         Initialize the GitHub client.
         
         Args:
             token (Optional[str]): GitHub Personal Access Token. If not provided, will use from config.
+            cache (Optional[ResponseCache]): Cache used to revalidate responses with ETags
         """
         self.token = token
-        self.github = None
+        self.cache = cache
         self.config = get_github_config()
+        self._session: Optional[aiohttp.ClientSession] = None
         
     async def authenticate(self) -> str:
         """
@@ -47,7 +120,7 @@ class GitHubClient:
         if self.token:
             return self.token
             
-        token = self.config["token"]
+        token = self.config.token
         
         if not token:
             raise ValueError("GitHub Personal Access Token is required for authentication. "
@@ -56,18 +129,75 @@ class GitHubClient:
         self.token = token
         return self.token
     
-    def initialize_client(self) -> None:
+    def _get_session(self) -> aiohttp.ClientSession:
+        """
+        Get the shared HTTP session, creating it on first use.
+        
+        Reusing one session lets connections to GitHub be pooled and kept
+        alive across requests instead of doing a new TLS handshake per PR.
+        
+        Returns:
+            aiohttp.ClientSession: Shared HTTP session
+        """
+        if self._session is None or self._session.closed:
+            self._session = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(limit=20, ttl_dns_cache=300),
+                headers={"Authorization": f"token {self.token}"}
+            )
+        return self._session
+    
+    async def close(self) -> None:
         """
-        Initialize the GitHub client with the authenticated token.
+        Close the shared HTTP session, if one was opened.
+        """
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+        self._session = None
+    
+    async def _rest_get(self, path: str, params: Optional[Dict[str, Any]] = None) -> Any:
+        """
+        Make a GET request against the GitHub REST API.
+        
+        Responses are revalidated with their ETag when a cache is configured;
+        a 304 reuses the cached body and doesn't count against the rate limit.
+        
+        Args:
+            path (str): API path, e.g. "/repos/owner/repo"
+            params (Optional[Dict[str, Any]]): Query string parameters
+            
+        Returns:
+            Any: Decoded JSON response
         """
         if not self.token:
             raise ValueError("GitHub token is required. Call authenticate() first.")
             
-        # Use the newer Auth.Token method instead of passing the token directly
-        auth = Auth.Token(self.token)
-        self.github = Github(auth=auth, base_url=self.config["api_url"])
+        url = f"{self.config.api_url.rstrip('/')}{path}"
+        cache_key = f"{url}?{urlencode(sorted(params.items()))}" if params else url
+        headers = {"Accept": "application/vnd.github+json"}
+        
+        cached = self.cache.get(cache_key) if self.cache else None
+        if cached:
+            headers["If-None-Match"] = cached[0]
+            
+        session = self._get_session()
+        async with session.get(url, params=params, headers=headers) as resp:
+            if resp.status == 304 and cached:
+                return orjson.loads(cached[1])
+                
+            _raise_if_transient(resp)
+            if resp.status != 200:
+                error_text = await resp.text()
+                raise ValueError(f"GitHub API request to {path} failed ({resp.status}): {error_text}")
+                
+            body = await resp.text()
+            etag = resp.headers.get("ETag")
+            
+        if self.cache and etag:
+            self.cache.set(cache_key, etag, body)
+            
+        return orjson.loads(body)
     
-    def get_repository(self, repo_url: str) -> Repository:
+    async def get_repository(self, repo_url: str) -> Dict[str, Any]:
         """
         Get a GitHub repository by URL.
         
@@ -75,63 +205,44 @@ class GitHubClient:
             repo_url (str): GitHub repository URL
             
         Returns:
-            Repository: GitHub repository object
+            Dict[str, Any]: Repository as returned by the REST API
         """
-        if not self.github:
-            self.initialize_client()
-            
-        # Extract owner and repo name from URL
-        # Handle formats like:
-        # - https://github.com/owner/repo
-        # - github.com/owner/repo
-        # - owner/repo
-        parts = repo_url.strip("/").split("/")
-        if "github.com" in parts:
-            idx = parts.index("github.com")
-            if len(parts) > idx + 2:
-                owner, repo = parts[idx + 1], parts[idx + 2]
-            else:
-                raise ValueError(f"Invalid GitHub repository URL: {repo_url}")
-        elif len(parts) == 2:
-            owner, repo = parts
-        else:
-            raise ValueError(f"Invalid GitHub repository URL: {repo_url}")
-            
-        # Remove .git suffix if present
-        if repo.endswith(".git"):
-            repo = repo[:-4]
-            
-        return self.github.get_repo(f"{owner}/{repo}")
+        owner, repo = parse_repo_url(repo_url)
+        return await self._rest_get(f"/repos/{owner}/{repo}")
     
-    async def get_release_date(self, repo: Repository, tag: Optional[str] = None) -> Optional[datetime]:
+    async def get_release_date(self, repo: Dict[str, Any], tag: Optional[str] = None) -> Optional[datetime]:
         """
         Get the date of a specific release or the latest release for a repository.
         
         Args:
-            repo (Repository): GitHub repository object
+            repo (Dict[str, Any]): Repository from get_repository()
             tag (Optional[str]): Release tag to get the date for. If None, get the latest release.
             
         Returns:
             Optional[datetime]: Date of the release, or None if no releases
         """
+        releases_path = f"/repos/{repo['full_name']}/releases"
+        
         try:
             if tag:
                 logger.info(f"Looking for release with tag: {tag}")
                 try:
-                    release = repo.get_release(tag)
-                    logger.info(f"Found release with tag {tag} created at {release.created_at}")
-                    return release.created_at
+                    release = await self._rest_get(f"{releases_path}/tags/{quote(tag, safe='')}")
+                    created_at = _parse_timestamp(release["created_at"])
+                    logger.info(f"Found release with tag {tag} created at {created_at}")
+                    return created_at
                 except Exception as e:
                     logger.warning(f"Failed to get release with tag {tag}: {e}")
                     logger.info("Falling back to latest release")
                     # Fall back to latest release if tag not found
             
             # Get latest release if no tag specified or tag not found
-            releases = repo.get_releases()
-            if releases.totalCount > 0:
-                latest_release = releases[0]
-                logger.info(f"Using latest release created at {latest_release.created_at}")
-                return latest_release.created_at
+            # (releases are listed newest first, including pre-releases)
+            releases = await self._rest_get(releases_path, {"per_page": 1})
+            if releases:
+                created_at = _parse_timestamp(releases[0]["created_at"])
+                logger.info(f"Using latest release created at {created_at}")
+                return created_at
                 
             logger.warning("No releases found")
             return None
@@ -140,17 +251,21 @@ class GitHubClient:
             return None
     
     async def get_prs_since_date(
-        self, repo: Repository, since_date: Optional[datetime] = None
-    ) -> List[PullRequest]:
+        self, repo: Dict[str, Any], since_date: Optional[datetime] = None
+    ) -> List[Dict[str, Any]]:
         """
         Get pull requests merged since a specific date.
         
+        The search API already filters on merge date and author, so the search
+        results are used as-is instead of fetching every pull request again.
+        
         Args:
-            repo (Repository): GitHub repository object
+            repo (Dict[str, Any]): Repository from get_repository()
             since_date (Optional[datetime]): Date to filter PRs by
             
         Returns:
-            List[PullRequest]: List of pull requests
+            List[Dict[str, Any]]: Pull request summaries with number, title, body,
+                url, author, merged_at and diff_url
         """
         if not since_date:
             # Default to 30 days ago if no date provided
@@ -177,47 +292,80 @@ class GitHubClient:
         # This is much faster than iterating through all PRs
         # Use ISO 8601 format for precise timestamp comparison
         # Exclude Dependabot PRs with -author:app/dependabot
-        query = f"repo:{repo.full_name} is:pr is:merged -author:app/dependabot merged:>={since_date.strftime('%Y-%m-%dT%H:%M:%S%z')}"
+        query = f"repo:{repo['full_name']} is:pr is:merged -author:app/dependabot merged:>={since_date.strftime('%Y-%m-%dT%H:%M:%S%z')}"
         logger.info(f"Using search query: {query}")
         
+        # Limit to first 100 PRs for performance, which fits in one search page
+        max_prs = 100
+        
         # Get merged PRs since the date using search
-        prs_search = self.github.search_issues(query)
+        search = await self._rest_get("/search/issues", {"q": query, "per_page": max_prs})
+        if search.get("total_count", 0) > max_prs:
+            logger.info(f"Reached limit of {max_prs} PRs, ignoring the remaining search results")
         result = []
         
-        # Limit to first 100 PRs for performance
-        max_prs = 100
-        count = 0
-        
-        for issue in prs_search:
-            if count >= max_prs:
-                logger.info(f"Reached limit of {max_prs} PRs, stopping search")
-                break
+        for item in search.get("items", []):
+            # Skip Dependabot PRs (double-check in case search filter didn't catch it)
+            author = (item.get("user") or {}).get("login", "Unknown")
+            if author == "dependabot[bot]" or author == "dependabot-preview[bot]":
+                logger.info(f"Skipping Dependabot PR #{item['number']}: {item['title']}")
+                continue
                 
-            # Convert issue to PR
-            pr_number = issue.number
-            pr = repo.get_pull(pr_number)
+            # A merged PR is closed by its merge, so closed_at stands in for
+            # merged_at on older servers that don't report it
+            pull_request = item["pull_request"]
+            merged_at = _parse_timestamp(pull_request.get("merged_at") or item.get("closed_at"))
             
-            # Check if PR is merged and not from Dependabot
-            if pr.merged and pr.merged_at:
-                # Skip Dependabot PRs (double-check in case search filter didn't catch it)
-                if pr.user.login == "dependabot[bot]" or pr.user.login == "dependabot-preview[bot]":
-                    logger.info(f"Skipping Dependabot PR #{pr.number}: {pr.title}")
-                    continue
-                    
-                # Use the full datetime object for more precise comparison
-                if pr.merged_at >= since_date:
-                    result.append(pr)
-                    count += 1
+            result.append({
+                "number": item["number"],
+                "title": item["title"],
+                "body": item.get("body") or "",
+                "url": item["html_url"],
+                "author": author,
+                "merged_at": merged_at.isoformat() if merged_at else None,
+                # The API endpoint serves the diff for the diff media type and,
+                # unlike github.com/.../N.diff, supports token auth and ETags
+                "diff_url": pull_request["url"],
+            })
                 
         logger.info(f"Found {len(result)} PRs merged after {since_date} (excluding Dependabot PRs)")
         return result
     
-    async def get_pr_diff(self, pr: PullRequest) -> str:
+    @staticmethod
+    async def _read_text_prefix(resp: aiohttp.ClientResponse, max_bytes: int) -> str:
+        """
+        Read and decode at most max_bytes bytes of a response body.
+        
+        The body is streamed and reading stops as soon as enough bytes have
+        arrived, so huge diffs are never held in memory. The prefix is decoded
+        once; a multi-byte character cut off at the end is dropped.
+        
+        Args:
+            resp (aiohttp.ClientResponse): Response to read from
+            max_bytes (int): Maximum number of bytes to read
+            
+        Returns:
+            str: The beginning of the response body
+        """
+        buffer = bytearray()
+        
+        async for chunk in resp.content.iter_chunked(8192):
+            buffer += chunk
+            if len(buffer) >= max_bytes:
+                break
+                
+        # A non-final incremental decode holds back an incomplete trailing character
+        decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+        return decoder.decode(bytes(buffer[:max_bytes]))
+    
+    async def get_pr_diff(self, pr: Dict[str, Any], max_bytes: Optional[int] = None) -> str:
         """
         Get the diff for a pull request.
         
         Args:
-            pr (PullRequest): GitHub pull request object
+            pr (Dict[str, Any]): Pull request summary from get_prs_since_date()
+            max_bytes (Optional[int]): If set, only the first max_bytes bytes
+                of the diff are downloaded and returned
             
         Returns:
             str: Pull request diff
@@ -226,37 +374,186 @@ class GitHubClient:
             raise ValueError("GitHub token is required. Call authenticate() first.")
             
         headers = {
-            "Accept": "application/vnd.github.v3.diff",
-            "Authorization": f"token {self.token}"
+            "Accept": "application/vnd.github.v3.diff"
         }
         
-        async with aiohttp.ClientSession() as session:
-            async with session.get(pr.diff_url, headers=headers) as resp:
-                if resp.status != 200:
-                    error_text = await resp.text()
-                    raise ValueError(f"Failed to get PR diff: {error_text}")
+        # Truncated diffs are cached separately from full ones
+        diff_url = pr["diff_url"]
+        cache_key = diff_url if max_bytes is None else f"{diff_url}#max_bytes={max_bytes}"
+        
+        # Revalidate a cached diff; a 304 doesn't count against the rate limit
+        cached = self.cache.get(cache_key) if self.cache else None
+        if cached:
+            headers["If-None-Match"] = cached[0]
+        
+        session = self._get_session()
+        async with session.get(diff_url, headers=headers) as resp:
+            if resp.status == 304 and cached:
+                logger.debug(f"Using cached diff for PR #{pr['number']}")
+                return cached[1]
+                
+            _raise_if_transient(resp)
+            if resp.status != 200:
+                error_text = await resp.text()
+                raise ValueError(f"Failed to get PR diff: {error_text}")
+                
+            if max_bytes is None:
+                diff = await resp.text()
+            else:
+                diff = await self._read_text_prefix(resp, max_bytes)
+            etag = resp.headers.get("ETag")
+            
+        if self.cache and etag:
+            self.cache.set(cache_key, etag, diff)
+            
+        return diff
+    
+    def _graphql_url(self) -> str:
+        """
+        Get the GraphQL endpoint matching the configured REST API URL.
+        
+        Returns:
+            str: GraphQL endpoint URL
+        """
+        api_url = self.config.api_url.rstrip("/")
+        
+        # GitHub Enterprise serves GraphQL at /api/graphql next to /api/v3
+        if api_url.endswith("/v3"):
+            return api_url[:-2] + "graphql"
+            
+        return f"{api_url}/graphql"
+    
+    async def _graphql(self, query: str, variables: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Run a GraphQL query against the GitHub API.
+        
+        Args:
+            query (str): GraphQL query
+            variables (Dict[str, Any]): Query variables
+            
+        Returns:
+            Dict[str, Any]: The "data" member of the response
+        """
+        if not self.token:
+            raise ValueError("GitHub token is required. Call authenticate() first.")
+            
+        session = self._get_session()
+        payload = {"query": query, "variables": variables}
+        async with session.post(self._graphql_url(), json=payload) as resp:
+            _raise_if_transient(resp)
+            if resp.status != 200:
+                error_text = await resp.text()
+                raise ValueError(f"GraphQL request failed: {error_text}")
+                
+            result = await resp.json()
+            
+        if result.get("errors"):
+            raise ValueError(f"GraphQL request failed: {result['errors']}")
+            
+        return result["data"]
+    
+    async def get_pr_metadata(
+        self, repo: Dict[str, Any], numbers: List[int]
+    ) -> Dict[int, Dict[str, Any]]:
+        """
+        Get metadata and changed files for many pull requests at once.
+        
+        Pull requests are looked up in batches of GRAPHQL_BATCH_SIZE using
+        aliased GraphQL queries, so one round-trip replaces several REST calls
+        per pull request.
+        
+        Args:
+            repo (Dict[str, Any]): Repository from get_repository()
+            numbers (List[int]): Pull request numbers
+            
+        Returns:
+            Dict[int, Dict[str, Any]]: GraphQL pull request nodes keyed by number
+        """
+        owner, name = repo["full_name"].split("/", 1)
+        
+        async def fetch_batch(batch: List[int]) -> Dict[str, Any]:
+            aliases = "\n".join(
+                f"pr{number}: pullRequest(number: {number}) {{{_PR_GRAPHQL_FIELDS}}}"
+                for number in batch
+            )
+            query = (
+                "query($owner: String!, $name: String!) {"
+                f" repository(owner: $owner, name: $name) {{ {aliases} }} }}"
+            )
+            data = await self._graphql(query, {"owner": owner, "name": name})
+            return data["repository"]
+        
+        batches = [
+            numbers[i:i + GRAPHQL_BATCH_SIZE]
+            for i in range(0, len(numbers), GRAPHQL_BATCH_SIZE)
+        ]
+        results = await asyncio.gather(*(fetch_batch(batch) for batch in batches))
+        
+        metadata = {}
+        for nodes in results:
+            for node in nodes.values():
+                if node:
+                    metadata[node["number"]] = node
                     
-                return await resp.text()
+        logger.info(f"Fetched metadata for {len(metadata)} PRs in {len(batches)} GraphQL queries")
+        return metadata
     
-    async def get_pr_details(self, pr: PullRequest) -> Dict[str, Any]:
+    async def get_pr_details(
+        self, pr: Dict[str, Any], metadata: Optional[Dict[str, Any]] = None
+    ) -> Dict[str, Any]:
         """
         Get detailed information about a pull request.
         
         Args:
-            pr (PullRequest): GitHub pull request object
+            pr (Dict[str, Any]): Pull request summary from get_prs_since_date()
+            metadata (Optional[Dict[str, Any]]): GraphQL node from get_pr_metadata().
+                If provided, only the diff is fetched over REST. Otherwise, or if
+                the GraphQL file list was truncated, the full diff is downloaded
+                so changed files can be read from it.
             
         Returns:
             Dict[str, Any]: Pull request details
         """
+        if metadata:
+            author = metadata.get("author") or {}
+            merged_at = _parse_timestamp(metadata.get("mergedAt"))
+            files = metadata.get("files") or {}
+            
+            if (files.get("pageInfo") or {}).get("hasNextPage"):
+                # The GraphQL file list was cut off, so read every changed
+                # file from the full diff instead
+                diff = await self.get_pr_diff(pr)
+                changed_files = _DIFF_PATH_RE.findall(diff)
+                diff = diff[:MAX_DIFF_CHARS]
+            else:
+                # Each byte decodes to at most one character, so this many bytes
+                # never yields more diff than the prompt uses
+                diff = await self.get_pr_diff(pr, max_bytes=MAX_DIFF_CHARS)
+                changed_files = [f["path"] for f in files.get("nodes") or []]
+            
+            return {
+                "number": metadata["number"],
+                "title": metadata["title"],
+                "body": metadata.get("body") or "",
+                "url": metadata["url"],
+                "author": author.get("login", "Unknown"),
+                "merged_at": merged_at.isoformat() if merged_at else None,
+                "diff": diff,
+                "changed_files": changed_files
+            }
+        
+        # Without metadata, read the changed files from the diff's file headers
+        # instead of paying for another paginated REST call
         diff = await self.get_pr_diff(pr)
+        changed_files = _DIFF_PATH_RE.findall(diff)
         
         return {
-            "number": pr.number,
-            "title": pr.title,
-            "body": pr.body or "",
-            "url": pr.html_url,
-            "author": pr.user.login if pr.user else "Unknown",
-            "merged_at": pr.merged_at.isoformat() if pr.merged_at else None,
-            "diff": diff,
-            "changed_files": [f.filename for f in pr.get_files()]
+            "number": pr["number"],
+            "title": pr["title"],
+            "body": pr["body"],
+            "url": pr["url"],
+            "author": pr["author"],
+            "merged_at": pr["merged_at"],
+            "diff": diff[:MAX_DIFF_CHARS],
+            "changed_files": changed_files
         }
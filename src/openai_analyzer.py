@@ -4,74 +4,294 @@ OpenAI analyzer module for DocuPR.
 This module handles the analysis of pull requests using OpenAI's API.
 """
 
-import json
+import asyncio
+import copy
 import logging
-import sys
-import time
+import re
+import textwrap
 from typing import Dict, List, Any, Optional
 
-from openai import OpenAI
+import msgspec
+import orjson
+from aiolimiter import AsyncLimiter
+from openai import AsyncOpenAI
 from pydantic import ValidationError
 
-from .config import get_openai_config
-from .schemas import AnalysisResult, DocsImpact
+from .cache import AnalysisCache
+from .config import MAX_DIFF_CHARS, get_openai_config
+from .schemas import AnalysisResult, AnalysisResultStruct, BatchOutputLine, DocsImpactStruct, PRAnalysis
 
 logger = logging.getLogger(__name__)
 
+# Instructions sent with every PR; extra instructions from the config are appended
+_SYSTEM_PROMPT_BASE = textwrap.dedent("""\
+    You are a documentation specialist analyzing GitHub pull requests. Your task is to:
+
+    1. Determine if this PR contains end-user facing changes (Yes/No)
+       - End-user facing changes are those that affect the people who use the finished software product, 
+         NOT the developers working on the code
+
+       Examples of end-user facing changes:
+       - Changes to CLI commands or arguments
+       - Changes to configuration file formats
+       - Changes to APIs that users directly interact with
+       - New features or modifications to existing features that users interact with
+       - Changes to error messages shown to users
+       - Changes to user documentation
+
+       Examples of NON-user facing changes:
+       - Internal refactoring
+       - Code cleanup or formatting
+       - Development documentation updates
+       - Test improvements
+       - CI/CD pipeline changes
+       - Internal logging changes
+       - Performance optimizations (unless they require user action)
+       - Security fixes (unless they require user action)
+
+    2. Identify documentation impact:
+       - Only suggest documentation updates for changes that affect end-users
+       - Existing user documentation files that need updates
+       - New user documentation sections that should be created
+       - Suggested content for user-facing documentation updates
+
+    Analyze the PR title, description, and code changes (diff) to make your determination.
+    Be conservative - if a change is purely internal, mark it as not user-facing.
+
+    Your response MUST be a valid JSON object matching this structure:
+    {
+      "user_facing": boolean,
+      "docs_impact": {
+        "update_existing": ["list of existing docs to update"],
+        "create_new": ["list of new docs to create"],
+        "suggested_content": ["list of suggested content or sections"]
+      },
+      "reasoning": "brief explanation of your analysis and why it is/isn't user-facing"
+    }
+
+    Do not include any text outside the JSON object.
+""")
+
+# Result used when a response can't be parsed; deep-copy before modifying
+_DEFAULT_RESULT: Dict[str, Any] = {
+    "user_facing": True,  # Assume user-facing by default
+    "docs_impact": {
+        "update_existing": [],
+        "create_new": [],
+        "suggested_content": []
+    },
+    "reasoning": "Extracted from non-JSON response"
+}
+
+# Decoder for the newline-delimited output file of a Batch API job
+_BATCH_OUTPUT_DECODER = msgspec.json.Decoder(BatchOutputLine)
+
+# JSON in a ```json code block, and the outermost braces anywhere in a response
+_JSON_FENCE_RE = re.compile(r"```json\s*(\{.*?\})\s*```", re.DOTALL)
+_JSON_BRACE_RE = re.compile(r"\{.*\}", re.DOTALL)
+
+# A sentence (or line) mentioning documentation, in a response that isn't JSON
+_DOC_SENTENCE_RE = re.compile(r"[^.\n]*documentation[^.\n]*\.?", re.IGNORECASE)
+
+# Retries of a failed OpenAI request before analyze_pr gives up on it
+OPENAI_MAX_RETRIES = 5
+
+def _extract_json_from_markdown(content: str) -> Optional[str]:
+    """
+    Extract JSON from markdown code blocks.
+    
+    Args:
+        content (str): The content to extract JSON from
+        
+    Returns:
+        Optional[str]: The extracted JSON string, or None if not found
+    """
+    # Check for a ```json code block first, then for any JSON-like structure
+    match = _JSON_FENCE_RE.search(content)
+    if match:
+        return match.group(1)
+    
+    match = _JSON_BRACE_RE.search(content)
+    if match:
+        return match.group(0)
+        
+    return None
+
+def _decode_analysis_response(content: str) -> Optional[AnalysisResultStruct]:
+    """
+    Decode a response that is a valid analysis object.
+    
+    Args:
+        content (str): The response content from OpenAI
+        
+    Returns:
+        Optional[AnalysisResultStruct]: The decoded result, or None if the
+            response isn't a valid analysis object
+    """
+    try:
+        return msgspec.json.decode(content, type=AnalysisResultStruct)
+    except msgspec.DecodeError:
+        pass
+    
+    # msgspec is strict about types; Pydantic also accepts coercible values
+    try:
+        result = AnalysisResult.model_validate_json(content).model_dump()
+        return msgspec.convert(result, AnalysisResultStruct)
+    except ValidationError:
+        logger.debug("OpenAI response is not a valid analysis object")
+        return None
+
+def _parse_non_conforming_response(content: str) -> AnalysisResultStruct:
+    """
+    Parse a response that isn't a valid analysis object.
+    
+    This happens with OpenAI-compatible endpoints (see OPENAI_API_BASE)
+    that ignore JSON mode and answer in prose or markdown, or with a
+    truncated response.
+    
+    Args:
+        content (str): The response content from OpenAI
+        
+    Returns:
+        AnalysisResultStruct: The parsed result
+    """
+    # Try extracting JSON from markdown
+    json_str = _extract_json_from_markdown(content)
+    if json_str:
+        try:
+            result = AnalysisResult.model_validate(orjson.loads(json_str)).model_dump()
+            return msgspec.convert(result, AnalysisResultStruct)
+        except (orjson.JSONDecodeError, ValidationError):
+            pass
+    
+    # If all extraction attempts fail, create a default result
+    logger.error(f"Failed to extract valid JSON from OpenAI response")
+    
+    # Create default result
+    result = copy.deepcopy(_DEFAULT_RESULT)
+    
+    # Try to extract useful information from the raw response:
+    # sentences mentioning documentation
+    result["docs_impact"]["suggested_content"].extend(
+        match.group(0).strip() for match in _DOC_SENTENCE_RE.finditer(content)
+    )
+    
+    return msgspec.convert(result, AnalysisResultStruct)
+
+def parse_analysis_response(content: str) -> AnalysisResultStruct:
+    """
+    Parse the OpenAI response content into a structured result.
+    
+    Requests are made in JSON mode, so the response is normally a valid
+    analysis object and is decoded and validated in one pass.
+    
+    Args:
+        content (str): The response content from OpenAI
+        
+    Returns:
+        AnalysisResultStruct: The parsed result
+    """
+    result = _decode_analysis_response(content)
+    if result is None:
+        result = _parse_non_conforming_response(content)
+    return result
+
+
 class OpenAIAnalyzer:
     """
     Analyzer for pull requests using OpenAI's API.
     """
     
-    def __init__(self):
+    def __init__(self, cache: Optional[AnalysisCache] = None):
         """
         Initialize the OpenAI analyzer.
+        
+        Args:
+            cache (Optional[AnalysisCache]): Cache of responses for previously seen prompts
         """
         config = get_openai_config()
+        self.cache = cache
         
         # Initialize the OpenAI client with the API key
-        # Create a custom http client with no proxy to avoid the 'proxies' error
+        # Create a custom http client with no proxy to avoid the 'proxies' error,
+        # with a connection pool sized for concurrent requests. HTTP/2 lets
+        # concurrent requests share one TLS connection.
         import httpx
-        http_client = httpx.Client()
+        timeout = httpx.Timeout(60.0, connect=10.0)
+        http_client = httpx.AsyncClient(
+            http2=True,
+            limits=httpx.Limits(
+                max_connections=100,
+                max_keepalive_connections=20,
+                keepalive_expiry=60.0
+            ),
+            timeout=timeout
+        )
         
-        # Initialize the OpenAI client with explicit parameters to avoid proxy issues
-        self.client = OpenAI(
-            api_key=config["api_key"],
+        # Initialize the async OpenAI client with explicit parameters to avoid proxy issues.
+        # The client retries connection errors, 429s and 5xx responses with
+        # exponential backoff and jitter before raising.
+        self.client = AsyncOpenAI(
+            api_key=config.api_key,
             http_client=http_client,
-            base_url=config["base_url"],
-            timeout=60.0
+            base_url=config.base_url,
+            timeout=timeout,
+            max_retries=OPENAI_MAX_RETRIES
         )
         
-        self.model = config["model"]
-        self.max_tokens = config["max_tokens"]
-        self.temperature = config["temperature"]
-        self.extra_instructions = config["extra_instructions"]
+        self.model = config.model
+        self.max_tokens = config.max_tokens
+        self.temperature = config.temperature
+        self.extra_instructions = config.extra_instructions
         
-        # Rate limiting
-        self.request_count = 0
-        self.last_request_time = 0
+        # Rate limiting: a leaky bucket allowing rate_limit_per_minute requests a minute
         self.rate_limit_per_minute = 20  # Adjust based on your OpenAI rate limits
+        self._limiter = AsyncLimiter(self.rate_limit_per_minute, 60)
+        
+        # Bound the number of requests in flight at once
+        self._request_semaphore = asyncio.Semaphore(self.rate_limit_per_minute)
+        
+        # Build the system prompt once; it is the same for every PR
+        self._system_prompt = _SYSTEM_PROMPT_BASE
+        if self.extra_instructions:
+            self._system_prompt += f"\n\nAdditional instructions:\n{self.extra_instructions}"
+        
+    async def close(self) -> None:
+        """
+        Close the underlying HTTP client.
+        """
+        await self.client.close()
         
     async def _rate_limit(self) -> None:
         """
         Implement rate limiting for OpenAI API calls.
+        
+        Waits without blocking the event loop until the limiter has capacity.
+        Concurrent callers are served in the order they arrive.
         """
-        current_time = time.time()
-        time_since_last_request = current_time - self.last_request_time
-        
-        # If we've made requests in the last minute, check if we need to wait
-        if time_since_last_request < 60 and self.request_count >= self.rate_limit_per_minute:
-            wait_time = 60 - time_since_last_request
-            logger.info(f"Rate limiting: waiting {wait_time:.2f} seconds")
-            time.sleep(wait_time)
-            self.request_count = 0
-            
-        # If it's been more than a minute since the last request, reset the counter
-        elif time_since_last_request >= 60:
-            self.request_count = 0
+        await self._limiter.acquire()
+        
+    def _completion_params(self, system_prompt: str, user_message: str) -> Dict[str, Any]:
+        """
+        Build the chat completion parameters for a prompt.
+        
+        Args:
+            system_prompt (str): The system prompt to send to OpenAI
+            user_message (str): The user message to send to OpenAI
             
-        self.request_count += 1
-        self.last_request_time = time.time()
+        Returns:
+            Dict[str, Any]: Parameters for the chat completions endpoint
+        """
+        return {
+            "model": self.model,
+            "messages": [
+                {"role": "system", "content": system_prompt},
+                {"role": "user", "content": user_message}
+            ],
+            "max_tokens": self.max_tokens,
+            "temperature": self.temperature,
+            "response_format": {"type": "json_object"}
+        }
         
     async def _get_openai_response(self, system_prompt: str, user_message: str) -> str:
         """
@@ -84,110 +304,144 @@ class OpenAIAnalyzer:
         Returns:
             str: The response content from OpenAI
         """
-        response = self.client.chat.completions.create(
-            model=self.model,
-            messages=[
-                {"role": "system", "content": system_prompt},
-                {"role": "user", "content": user_message}
-            ],
-            max_tokens=self.max_tokens,
-            temperature=self.temperature,
-            response_format={"type": "json_object"}
-        )
+        async with self._request_semaphore:
+            response = await self.client.chat.completions.create(
+                **self._completion_params(system_prompt, user_message)
+            )
         
         return response.choices[0].message.content
     
-    def _extract_json_from_markdown(self, content: str) -> Optional[str]:
+    def _parse_openai_response(self, content: str) -> AnalysisResultStruct:
         """
-        Extract JSON from markdown code blocks.
+        Parse the OpenAI response content into a structured result.
         
         Args:
-            content (str): The content to extract JSON from
+            content (str): The response content from OpenAI
             
         Returns:
-            Optional[str]: The extracted JSON string, or None if not found
+            AnalysisResultStruct: The parsed result
+        """
+        return parse_analysis_response(content)
+    
+    def _build_user_message(self, pr_details: Dict[str, Any]) -> str:
         """
-        # Check for markdown code blocks
-        if "```json" in content and "```" in content:
-            start = content.find("```json") + 7
-            end = content.find("```", start)
-            if start > 6 and end > start:
-                return content[start:end].strip()
-        
-        # Check for any JSON-like structure
-        start_idx = content.find("{")
-        end_idx = content.rfind("}")
-        
-        if start_idx >= 0 and end_idx > start_idx:
-            return content[start_idx:end_idx + 1]
+        Build the user message describing a pull request.
+        
+        Args:
+            pr_details (Dict[str, Any]): Pull request details
             
-        return None
+        Returns:
+            str: The user message to send to OpenAI
+        """
+        # Join the parts once instead of building intermediate copies of the
+        # (potentially large) diff
+        parts = [
+            f"Pull Request #{pr_details['number']}: {pr_details['title']}\n\n",
+            "Description:\n",
+            pr_details["body"] or "",
+            "\n\nChanged Files:\n",
+            orjson.dumps(pr_details["changed_files"]).decode(),
+            "\n\nDiff:\n```diff\n",
+            pr_details["diff"][:MAX_DIFF_CHARS],
+            "\n```\n\n",
+            "Please analyze this PR and determine if it contains user-facing changes "
+            "and what documentation updates are needed.\n",
+        ]
+        return "".join(parts)
     
-    def _create_default_result(self) -> Dict[str, Any]:
+    def _cache_key(self, user_message: str) -> Optional[str]:
         """
-        Create a default result when parsing fails.
+        Get the analysis cache key for a user message.
         
+        Args:
+            user_message (str): The user message to send to OpenAI
+            
         Returns:
-            Dict[str, Any]: The default result
+            Optional[str]: The cache key, or None if caching is disabled
         """
-        return {
-            "user_facing": True,  # Assume user-facing by default
-            "docs_impact": {
-                "update_existing": [],
-                "create_new": [],
-                "suggested_content": []
-            },
-            "reasoning": "Extracted from non-JSON response"
-        }
+        if not self.cache:
+            return None
+        return AnalysisCache.make_key(self.model, self._system_prompt, user_message)
     
-    def _parse_openai_response(self, content: str) -> Dict[str, Any]:
+    def _finalize_result(self, content: str, pr_details: Dict[str, Any]) -> PRAnalysis:
         """
-        Parse the OpenAI response content into a structured result.
+        Parse an OpenAI response and attach the pull request metadata.
         
         Args:
             content (str): The response content from OpenAI
+            pr_details (Dict[str, Any]): Pull request details
             
         Returns:
-            Dict[str, Any]: The parsed result
+            PRAnalysis: Analysis results
+        """
+        return self._add_pr_metadata(self._parse_openai_response(content), pr_details)
+    
+    def _parse_and_cache(self, content: str, cache_key: Optional[str]) -> AnalysisResultStruct:
         """
-        # Clean and prepare the content for JSON parsing
-        content = content.strip()
+        Parse a fresh OpenAI response, caching it only if it is a valid analysis.
         
-        # Try direct parsing with validation
-        try:
-            data = json.loads(content)
-            return AnalysisResult(**data).model_dump()
-        except (json.JSONDecodeError, ValidationError):
-            # Only log warning on JSON decode error
-            if isinstance(sys.exc_info()[1], json.JSONDecodeError):
-                logger.warning("Failed to parse OpenAI response as JSON, attempting extraction")
-        
-        # Try extracting JSON from markdown
-        json_str = self._extract_json_from_markdown(content)
-        if json_str:
-            try:
-                data = json.loads(json_str)
-                return AnalysisResult(**data).model_dump()
-            except (json.JSONDecodeError, ValidationError):
-                pass
+        Responses that need the extraction or default fallback aren't cached,
+        so a truncated or prose response is retried on the next run instead
+        of being replayed for the lifetime of the cache.
         
-        # If all extraction attempts fail, create a default result
-        logger.error(f"Failed to extract valid JSON from OpenAI response")
+        Args:
+            content (str): The response content from OpenAI
+            cache_key (Optional[str]): Cache key for the prompt, or None if caching is disabled
+            
+        Returns:
+            AnalysisResultStruct: The parsed result
+        """
+        result = _decode_analysis_response(content)
+        if result is None:
+            return _parse_non_conforming_response(content)
         
-        # Create default result
-        result = self._create_default_result()
+        if cache_key:
+            self.cache.set(cache_key, content)
+        return result
+    
+    @staticmethod
+    def _add_pr_metadata(result: AnalysisResultStruct, pr_details: Dict[str, Any]) -> PRAnalysis:
+        """
+        Attach the pull request metadata to a parsed result.
         
-        # Try to extract useful information from the raw response
-        if "documentation" in content.lower():
-            # Extract sentences containing "documentation"
-            sentences = content.split(". ")
-            for sentence in sentences:
-                if "documentation" in sentence.lower():
-                    result["docs_impact"]["suggested_content"].append(sentence.strip())
+        Args:
+            result (AnalysisResultStruct): The parsed result
+            pr_details (Dict[str, Any]): Pull request details
+            
+        Returns:
+            PRAnalysis: Analysis results
+        """
+        return PRAnalysis(
+            pr_number=pr_details["number"],
+            pr_title=pr_details["title"],
+            pr_url=pr_details["url"],
+            user_facing=result.user_facing,
+            docs_impact=result.docs_impact,
+            reasoning=result.reasoning
+        )
+    
+    def error_result(self, pr_details: Dict[str, Any], error: str) -> PRAnalysis:
+        """
+        Create the result for a pull request that couldn't be analyzed.
         
-        return result
+        Args:
+            pr_details (Dict[str, Any]): Pull request details or summary
+            error (str): Description of the error
+            
+        Returns:
+            PRAnalysis: Analysis results marked with the error
+        """
+        return PRAnalysis(
+            pr_number=pr_details["number"],
+            pr_title=pr_details["title"],
+            pr_url=pr_details["url"],
+            user_facing=False,
+            docs_impact=DocsImpactStruct(),
+            reasoning=f"Error: {error}",
+            error=error
+        )
     
-    async def analyze_pr(self, pr_details: Dict[str, Any]) -> Dict[str, Any]:
+    async def analyze_pr(self, pr_details: Dict[str, Any]) -> PRAnalysis:
         """
         Analyze a pull request to determine if it contains user-facing changes
         and what documentation updates are needed.
@@ -196,107 +450,130 @@ class OpenAIAnalyzer:
             pr_details (Dict[str, Any]): Pull request details
             
         Returns:
-            Dict[str, Any]: Analysis results
+            PRAnalysis: Analysis results
         """
-        await self._rate_limit()
+        user_message = self._build_user_message(pr_details)
         
-        # Prepare the prompt for OpenAI
-        system_prompt = """
-        You are a documentation specialist analyzing GitHub pull requests. Your task is to:
-
-        1. Determine if this PR contains end-user facing changes (Yes/No)
-           - End-user facing changes are those that affect the people who use the finished software product, 
-             NOT the developers working on the code
-           
-           Examples of end-user facing changes:
-           - Changes to CLI commands or arguments
-           - Changes to configuration file formats
-           - Changes to APIs that users directly interact with
-           - New features or modifications to existing features that users interact with
-           - Changes to error messages shown to users
-           - Changes to user documentation
-           
-           Examples of NON-user facing changes:
-           - Internal refactoring
-           - Code cleanup or formatting
-           - Development documentation updates
-           - Test improvements
-           - CI/CD pipeline changes
-           - Internal logging changes
-           - Performance optimizations (unless they require user action)
-           - Security fixes (unless they require user action)
-           
-        2. Identify documentation impact:
-           - Only suggest documentation updates for changes that affect end-users
-           - Existing user documentation files that need updates
-           - New user documentation sections that should be created
-           - Suggested content for user-facing documentation updates
-
-        Analyze the PR title, description, and code changes (diff) to make your determination.
-        Be conservative - if a change is purely internal, mark it as not user-facing.
-        
-        Your response MUST be a valid JSON object matching this structure:
-        {
-          "user_facing": boolean,
-          "docs_impact": {
-            "update_existing": ["list of existing docs to update"],
-            "create_new": ["list of new docs to create"],
-            "suggested_content": ["list of suggested content or sections"]
-          },
-          "reasoning": "brief explanation of your analysis and why it is/isn't user-facing"
-        }
-        
-        Do not include any text outside the JSON object.
+        try:
+            # Reuse the response for an identical prompt from a previous run
+            cache_key = self._cache_key(user_message)
+            content = None
+            if cache_key:
+                content = self.cache.get(cache_key)
+                if content is not None:
+                    logger.info(f"Using cached analysis for PR #{pr_details['number']}")
+            
+            if content is not None:
+                return self._finalize_result(content, pr_details)
+            
+            # Get response from OpenAI
+            await self._rate_limit()
+            content = await self._get_openai_response(self._system_prompt, user_message)
+            return self._add_pr_metadata(self._parse_and_cache(content, cache_key), pr_details)
+                
+        except Exception as e:
+            logger.error(f"OpenAI API error: {e}")
+            return self.error_result(pr_details, str(e))
+    
+    async def analyze_prs_batch(
+        self,
+        pr_details_list: List[Dict[str, Any]],
+        poll_interval: float = 30.0
+    ) -> List[PRAnalysis]:
         """
+        Analyze pull requests with a single OpenAI Batch API job.
         
-        # Add any extra instructions if provided
-        if self.extra_instructions:
-            system_prompt += f"\n\nAdditional instructions:\n{self.extra_instructions}"
+        Batch jobs are billed at a discount and don't count against the
+        real-time rate limits, but can take up to 24 hours to complete.
         
-        # Prepare the user message with PR details
-        user_message = f"""
-        Pull Request #{pr_details['number']}: {pr_details['title']}
-        
-        Description:
-        {pr_details['body']}
+        Args:
+            pr_details_list (List[Dict[str, Any]]): Details of the pull requests to analyze
+            poll_interval (float): Seconds to wait between batch status checks
+            
+        Returns:
+            List[PRAnalysis]: Analysis results, in the same order as pr_details_list
+        """
+        results: List[Optional[PRAnalysis]] = [None] * len(pr_details_list)
+        pending = {}
+        lines = []
         
-        Changed Files:
-        {json.dumps(pr_details['changed_files'], indent=2)}
+        for i, pr_details in enumerate(pr_details_list):
+            user_message = self._build_user_message(pr_details)
+            cache_key = self._cache_key(user_message)
+            
+            # Reuse the response for an identical prompt from a previous run
+            if cache_key:
+                content = self.cache.get(cache_key)
+                if content is not None:
+                    logger.info(f"Using cached analysis for PR #{pr_details['number']}")
+                    results[i] = self._finalize_result(content, pr_details)
+                    continue
+            
+            custom_id = f"pr-{pr_details['number']}"
+            pending[custom_id] = (i, cache_key)
+            lines.append(orjson.dumps({
+                "custom_id": custom_id,
+                "method": "POST",
+                "url": "/v1/chat/completions",
+                "body": self._completion_params(self._system_prompt, user_message)
+            }))
         
-        Diff:
-        ```diff
-        {pr_details['diff'][:10000]}  # Limit diff size to avoid token limits
-        ```
+        if lines:
+            try:
+                outputs = await self._run_batch(b"\n".join(lines), poll_interval)
+            except Exception as e:
+                logger.error(f"OpenAI batch error: {e}")
+                outputs = {}
+            
+            for custom_id, (i, cache_key) in pending.items():
+                pr_details = pr_details_list[i]
+                output = outputs.get(custom_id)
+                response = output.response if output else None
+                
+                if not response or response.status_code != 200 or not response.body.choices:
+                    error = (
+                        (output and output.error)
+                        or (response and response.body.error)
+                        or "No response in batch output"
+                    )
+                    logger.error(f"Batch analysis failed for PR #{pr_details['number']}: {error}")
+                    results[i] = self.error_result(pr_details, str(error))
+                    continue
+                
+                content = response.body.choices[0].message.content or ""
+                results[i] = self._add_pr_metadata(self._parse_and_cache(content, cache_key), pr_details)
         
-        Please analyze this PR and determine if it contains user-facing changes and what documentation updates are needed.
+        return results
+    
+    async def _run_batch(self, jsonl: bytes, poll_interval: float) -> Dict[str, BatchOutputLine]:
         """
+        Submit a batch job and wait for its output.
         
-        try:
-            # Get response from OpenAI
-            content = await self._get_openai_response(system_prompt, user_message)
-            
-            # Parse the response
-            result = self._parse_openai_response(content)
+        Args:
+            jsonl (bytes): Batch input, one request per line
+            poll_interval (float): Seconds to wait between batch status checks
             
-            # Add PR metadata to the result
-            result["pr_number"] = pr_details["number"]
-            result["pr_title"] = pr_details["title"]
-            result["pr_url"] = pr_details["url"]
+        Returns:
+            Dict[str, BatchOutputLine]: Batch output lines by custom_id
+        """
+        input_file = await self.client.files.create(file=("docupr-batch.jsonl", jsonl), purpose="batch")
+        batch = await self.client.batches.create(
+            input_file_id=input_file.id,
+            endpoint="/v1/chat/completions",
+            completion_window="24h"
+        )
+        logger.info(f"Submitted OpenAI batch {batch.id}")
+        
+        while batch.status not in ("completed", "failed", "expired", "cancelled"):
+            await asyncio.sleep(poll_interval)
+            batch = await self.client.batches.retrieve(batch.id)
+            logger.info(f"OpenAI batch {batch.id} is {batch.status}")
             
-            return result
-                
-        except Exception as e:
-            logger.error(f"OpenAI API error: {e}")
-            return {
-                "pr_number": pr_details["number"],
-                "pr_title": pr_details["title"],
-                "pr_url": pr_details["url"],
-                "user_facing": False,
-                "docs_impact": {
-                    "update_existing": [],
-                    "create_new": [],
-                    "suggested_content": []
-                },
-                "reasoning": f"Error: {str(e)}",
-                "error": str(e)
-            }
+        if batch.status != "completed" or not batch.output_file_id:
+            raise ValueError(f"OpenAI batch {batch.id} ended with status {batch.status}")
+        
+        output = await self.client.files.content(batch.output_file_id)
+        
+        # Decode and validate the whole output file in one call
+        lines = _BATCH_OUTPUT_DECODER.decode_lines(output.content)
+        return {line.custom_id: line for line in lines}
@@ -4,11 +4,16 @@ Report generator module for DocuPR.
 This module generates markdown reports based on PR analysis.
 """
 
-import json
 import logging
 import os
 from datetime import datetime
-from typing import Dict, List, Any
+from typing import Callable, List, Tuple
+
+import msgspec
+import orjson
+
+from .github_client import parse_repo_url
+from .schemas import PRAnalysis
 
 logger = logging.getLogger(__name__)
 
@@ -17,21 +22,47 @@ class ReportGenerator:
     Generator for documentation reports based on PR analysis.
     """
     
-    def __init__(self, output_dir: str = "."):
+    def __init__(self, output_dir: str = ".", clock: Callable[[], datetime] = datetime.now):
         """
         Initialize the report generator.
         
         Args:
             output_dir (str): Directory to save reports to
+            clock (Callable[[], datetime]): Returns the report timestamp
         """
+        # The directory is created when a report is written
         self.output_dir = output_dir
-        os.makedirs(output_dir, exist_ok=True)
+        self.clock = clock
+        
+    def _prepare(
+        self, 
+        repo_url: str, 
+        analysis_results: List[PRAnalysis]
+    ) -> Tuple[str, List[PRAnalysis], datetime]:
+        """
+        Compute the values shared by the markdown and JSON reports.
+        
+        Args:
+            repo_url (str): GitHub repository URL
+            analysis_results (List[PRAnalysis]): List of PR analysis results
+            
+        Returns:
+            Tuple[str, List[PRAnalysis], datetime]: Repository name, PRs with
+                user-facing changes, and the report timestamp, which is used for
+                both the filename and the report content
+        """
+        _, repo_name = parse_repo_url(repo_url)
+        
+        # Filter for user-facing changes
+        user_facing_prs = [pr for pr in analysis_results if pr.user_facing]
+        
+        return repo_name, user_facing_prs, self.clock()
         
     def generate_report(
         self, 
         repo_url: str, 
         since_date: datetime, 
-        analysis_results: List[Dict[str, Any]]
+        analysis_results: List[PRAnalysis]
     ) -> str:
         """
         Generate a markdown report based on PR analysis.
@@ -39,41 +70,36 @@ class ReportGenerator:
         Args:
             repo_url (str): GitHub repository URL
             since_date (datetime): Date to filter PRs by
-            analysis_results (List[Dict[str, Any]]): List of PR analysis results
+            analysis_results (List[PRAnalysis]): List of PR analysis results
             
         Returns:
             str: Path to the generated report
         """
-        # Filter for user-facing changes
-        user_facing_prs = [pr for pr in analysis_results if pr.get("user_facing", False)]
+        repo_name, user_facing_prs, now = self._prepare(repo_url, analysis_results)
         
         # Generate the report filename
-        repo_name = repo_url.strip("/").split("/")[-1]
-        if repo_name.endswith(".git"):
-            repo_name = repo_name[:-4]
-            
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        filename = f"docupr_{repo_name}_{timestamp}.md"
+        filename = f"docupr_{repo_name}_{now.strftime('%Y%m%d_%H%M%S')}.md"
         filepath = os.path.join(self.output_dir, filename)
         
-        # Generate the report content
-        with open(filepath, "w") as f:
-            # Report header
-            f.write(f"# Documentation Update Report for {repo_url}\n\n")
-            f.write(f"Generated on: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n\n")
-            f.write(f"Analyzing PRs since: {since_date.strftime('%Y-%m-%d')}\n\n")
-            
-            # Summary section
-            f.write("## Summary\n\n")
-            f.write(f"Total PRs analyzed: {len(analysis_results)}\n")
-            f.write(f"PRs with user-facing changes: {len(user_facing_prs)}\n\n")
-            
-            if not user_facing_prs:
-                f.write("No user-facing changes detected in the analyzed PRs.\n\n")
-                return filepath
-                
+        # Build the report content in memory and write it in one go
+        parts: List[str] = []
+        append = parts.append
+        
+        # Report header
+        append(f"# Documentation Update Report for {repo_url}\n\n")
+        append(f"Generated on: {now.strftime('%Y-%m-%d %H:%M:%S')}\n\n")
+        append(f"Analyzing PRs since: {since_date.strftime('%Y-%m-%d')}\n\n")
+        
+        # Summary section
+        append("## Summary\n\n")
+        append(f"Total PRs analyzed: {len(analysis_results)}\n")
+        append(f"PRs with user-facing changes: {len(user_facing_prs)}\n\n")
+        
+        if not user_facing_prs:
+            append("No user-facing changes detected in the analyzed PRs.\n\n")
+        else:
             # Documentation updates needed section
-            f.write("## Documentation Updates Needed\n\n")
+            append("## Documentation Updates Needed\n\n")
             
             # Collect all documentation updates
             all_updates = {
@@ -81,73 +107,74 @@ class ReportGenerator:
                 "create_new": set(),
                 "suggested_content": []
             }
+            update_existing = all_updates["update_existing"]
+            create_new = all_updates["create_new"]
+            suggested_content = all_updates["suggested_content"]
             
             for pr in user_facing_prs:
-                docs_impact = pr.get("docs_impact", {})
+                docs_impact = pr.docs_impact
+                update_existing.update(docs_impact.update_existing)
+                create_new.update(docs_impact.create_new)
                 
-                for update in docs_impact.get("update_existing", []):
-                    all_updates["update_existing"].add(update)
-                    
-                for new_doc in docs_impact.get("create_new", []):
-                    all_updates["create_new"].add(new_doc)
-                    
-                for suggestion in docs_impact.get("suggested_content", []):
-                    all_updates["suggested_content"].append({
-                        "pr": pr.get("pr_number"),
-                        "content": suggestion
-                    })
+                pr_number = pr.pr_number
+                suggested_content.extend(
+                    {"pr": pr_number, "content": suggestion}
+                    for suggestion in docs_impact.suggested_content
+                )
             
             # Existing docs to update
-            if all_updates["update_existing"]:
-                f.write("### Existing Documentation to Update\n\n")
-                for doc in sorted(all_updates["update_existing"]):
-                    f.write(f"- {doc}\n")
-                f.write("\n")
+            if update_existing:
+                append("### Existing Documentation to Update\n\n")
+                append("".join(f"- {doc}\n" for doc in sorted(update_existing)))
+                append("\n")
                 
             # New docs to create
-            if all_updates["create_new"]:
-                f.write("### New Documentation to Create\n\n")
-                for doc in sorted(all_updates["create_new"]):
-                    f.write(f"- {doc}\n")
-                f.write("\n")
+            if create_new:
+                append("### New Documentation to Create\n\n")
+                append("".join(f"- {doc}\n" for doc in sorted(create_new)))
+                append("\n")
                 
             # Suggested content
-            if all_updates["suggested_content"]:
-                f.write("### Suggested Content Updates\n\n")
-                for suggestion in all_updates["suggested_content"]:
-                    f.write(f"- PR #{suggestion['pr']}: {suggestion['content']}\n")
-                f.write("\n")
+            if suggested_content:
+                append("### Suggested Content Updates\n\n")
+                append("".join(
+                    f"- PR #{suggestion['pr']}: {suggestion['content']}\n"
+                    for suggestion in suggested_content
+                ))
+                append("\n")
                 
             # Detailed PR analysis
-            f.write("## Detailed PR Analysis\n\n")
+            append("## Detailed PR Analysis\n\n")
             
             for pr in user_facing_prs:
-                f.write(f"### PR #{pr.get('pr_number')}: {pr.get('pr_title')}\n\n")
-                f.write(f"- URL: {pr.get('pr_url')}\n")
-                f.write(f"- User-facing: Yes\n")
-                
-                if "reasoning" in pr:
-                    f.write(f"- Reasoning: {pr.get('reasoning')}\n\n")
+                append(f"### PR #{pr.pr_number}: {pr.pr_title}\n\n")
+                append(f"- URL: {pr.pr_url}\n")
+                append("- User-facing: Yes\n")
+                append(f"- Reasoning: {pr.reasoning}\n\n")
                     
-                docs_impact = pr.get("docs_impact", {})
+                docs_impact = pr.docs_impact
+                pr_updates = docs_impact.update_existing
+                pr_new_docs = docs_impact.create_new
+                pr_suggestions = docs_impact.suggested_content
                 
-                if docs_impact.get("update_existing"):
-                    f.write("#### Existing Documentation to Update\n\n")
-                    for doc in docs_impact.get("update_existing", []):
-                        f.write(f"- {doc}\n")
-                    f.write("\n")
+                if pr_updates:
+                    append("#### Existing Documentation to Update\n\n")
+                    append("".join(f"- {doc}\n" for doc in pr_updates))
+                    append("\n")
                     
-                if docs_impact.get("create_new"):
-                    f.write("#### New Documentation to Create\n\n")
-                    for doc in docs_impact.get("create_new", []):
-                        f.write(f"- {doc}\n")
-                    f.write("\n")
+                if pr_new_docs:
+                    append("#### New Documentation to Create\n\n")
+                    append("".join(f"- {doc}\n" for doc in pr_new_docs))
+                    append("\n")
                     
-                if docs_impact.get("suggested_content"):
-                    f.write("#### Suggested Content\n\n")
-                    for suggestion in docs_impact.get("suggested_content", []):
-                        f.write(f"- {suggestion}\n")
-                    f.write("\n")
+                if pr_suggestions:
+                    append("#### Suggested Content\n\n")
+                    append("".join(f"- {suggestion}\n" for suggestion in pr_suggestions))
+                    append("\n")
+        
+        os.makedirs(self.output_dir, exist_ok=True)
+        with open(filepath, "w", buffering=1 << 20) as f:
+            f.write("".join(parts))
                     
         logger.info(f"Report generated: {filepath}")
         return filepath
@@ -156,7 +183,7 @@ class ReportGenerator:
         self, 
         repo_url: str, 
         since_date: datetime, 
-        analysis_results: List[Dict[str, Any]]
+        analysis_results: List[PRAnalysis]
     ) -> str:
         """
         Generate a JSON report based on PR analysis.
@@ -164,32 +191,30 @@ class ReportGenerator:
         Args:
             repo_url (str): GitHub repository URL
             since_date (datetime): Date to filter PRs by
-            analysis_results (List[Dict[str, Any]]): List of PR analysis results
+            analysis_results (List[PRAnalysis]): List of PR analysis results
             
         Returns:
             str: Path to the generated report
         """
+        repo_name, user_facing_prs, now = self._prepare(repo_url, analysis_results)
+        
         # Generate the report filename
-        repo_name = repo_url.strip("/").split("/")[-1]
-        if repo_name.endswith(".git"):
-            repo_name = repo_name[:-4]
-            
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        filename = f"docupr_{repo_name}_{timestamp}.json"
+        filename = f"docupr_{repo_name}_{now.strftime('%Y%m%d_%H%M%S')}.json"
         filepath = os.path.join(self.output_dir, filename)
         
         # Generate the report content
         report = {
             "repository": repo_url,
-            "generated_at": datetime.now().isoformat(),
+            "generated_at": now.isoformat(),
             "since_date": since_date.isoformat(),
             "total_prs": len(analysis_results),
-            "user_facing_prs": len([pr for pr in analysis_results if pr.get("user_facing", False)]),
-            "analysis_results": analysis_results
+            "user_facing_prs": len(user_facing_prs),
+            "analysis_results": msgspec.to_builtins(analysis_results)
         }
         
-        with open(filepath, "w") as f:
-            json.dump(report, f, indent=2)
+        os.makedirs(self.output_dir, exist_ok=True)
+        with open(filepath, "wb") as f:
+            f.write(orjson.dumps(report, option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS))
             
         logger.info(f"JSON report generated: {filepath}")
         return filepath
@@ -1,10 +1,13 @@
 """
 Schema definitions for DocuPR.
 
-This module contains Pydantic models for data validation.
+This module contains Pydantic models for data validation, and msgspec
+mirrors of them for fast decoding of OpenAI responses and batch output.
 """
 
-from typing import List
+from typing import Any, Dict, List, Optional
+
+import msgspec
 from pydantic import BaseModel
 
 
@@ -20,3 +23,57 @@ class AnalysisResult(BaseModel):
     user_facing: bool
     docs_impact: DocsImpact
     reasoning: str
+
+
+class DocsImpactStruct(msgspec.Struct):
+    """msgspec mirror of DocsImpact."""
+    update_existing: List[str] = []
+    create_new: List[str] = []
+    suggested_content: List[str] = []
+
+
+class AnalysisResultStruct(msgspec.Struct):
+    """msgspec mirror of AnalysisResult."""
+    user_facing: bool
+    docs_impact: DocsImpactStruct
+    reasoning: str
+
+
+class PRAnalysis(msgspec.Struct, omit_defaults=True):
+    """Analysis result for a pull request, as passed to the report generator."""
+    pr_number: int
+    pr_title: str
+    pr_url: str
+    user_facing: bool
+    docs_impact: DocsImpactStruct
+    reasoning: str
+    error: Optional[str] = None
+
+
+class BatchMessage(msgspec.Struct):
+    """Message of a chat completion choice in batch output."""
+    content: Optional[str] = None
+
+
+class BatchChoice(msgspec.Struct):
+    """Chat completion choice in batch output."""
+    message: BatchMessage
+
+
+class BatchResponseBody(msgspec.Struct):
+    """Chat completion response body in batch output."""
+    choices: List[BatchChoice] = []
+    error: Optional[Dict[str, Any]] = None
+
+
+class BatchResponse(msgspec.Struct):
+    """HTTP response for one request in batch output."""
+    status_code: int
+    body: BatchResponseBody
+
+
+class BatchOutputLine(msgspec.Struct):
+    """One line of an OpenAI Batch API output file."""
+    custom_id: str
+    response: Optional[BatchResponse] = None
+    error: Optional[Dict[str, Any]] = None
@@ -0,0 +1,74 @@
+"""
+Shared fixtures for the DocuPR tests.
+"""
+
+import pytest
+from pytest_asyncio import is_async_test
+
+from src.github_client import GitHubClient
+
+
+def pytest_collection_modifyitems(items):
+    """
+    Run every async test in one session-wide event loop.
+    
+    This saves creating and tearing down a loop per test. Async fixtures use
+    the same loop through asyncio_default_fixture_loop_scope in pytest.ini.
+    """
+    session_loop = pytest.mark.asyncio(loop_scope="session")
+    for item in items:
+        if is_async_test(item):
+            item.add_marker(session_loop, append=False)
+
+
+@pytest.fixture
+async def gh_client():
+    """
+    GitHub client with a test token, closed after each test.
+
+    The client is function-scoped because tests replace methods such as
+    `_rest_get` and attributes such as `cache` on it.
+    """
+    client = GitHubClient(token="test_token")
+    yield client
+    await client.close()
+
+
+@pytest.fixture(scope="session")
+def mock_repo():
+    """
+    Repository payload as returned by the GitHub REST API.
+    """
+    return {"full_name": "owner/repo"}
+
+
+@pytest.fixture(scope="session")
+def mock_release_jan2023():
+    """
+    Release payload created on 2023-01-01.
+    """
+    return {"created_at": "2023-01-01T00:00:00Z"}
+
+
+@pytest.fixture(scope="session")
+def mock_pr():
+    """
+    Minimal PR dictionary as returned by `GitHubClient.get_prs_since_date`.
+    """
+    return {"number": 1, "diff_url": "https://api.github.com/repos/owner/repo/pulls/1"}
+
+
+@pytest.fixture(scope="session")
+def mock_pr_merged():
+    """
+    Full PR dictionary for a merged PR.
+    """
+    return {
+        "number": 1,
+        "title": "Test PR",
+        "body": "Test body",
+        "url": "https://github.com/owner/repo/pull/1",
+        "author": "testuser",
+        "merged_at": "2023-01-01T00:00:00",
+        "diff_url": "https://api.github.com/repos/owner/repo/pulls/1"
+    }
@@ -0,0 +1,91 @@
+"""
+Tests for the cache module.
+"""
+
+import time
+from unittest.mock import patch
+
+import pytest
+
+from src.cache import AnalysisCache, ResponseCache
+
+
+@pytest.fixture
+def response_cache(tmp_path):
+    """
+    Response cache backed by a temporary database.
+    """
+    cache = ResponseCache(str(tmp_path / "github.db"))
+    yield cache
+    cache.close()
+
+
+@pytest.fixture
+def analysis_cache(tmp_path):
+    """
+    Analysis cache backed by a temporary database.
+    """
+    cache = AnalysisCache(str(tmp_path / "openai.db"))
+    yield cache
+    cache.close()
+
+
+class TestResponseCache:
+    """
+    Test cases for the response cache.
+    """
+    
+    def test_get_missing(self, response_cache):
+        """
+        Test looking up a URL that was never cached.
+        """
+        assert response_cache.get("https://example.com/missing") is None
+        
+    def test_set_and_get(self, response_cache):
+        """
+        Test storing and replacing a cached response.
+        """
+        url = "https://github.com/owner/repo/pull/1.diff"
+        response_cache.set(url, '"etag1"', "diff 1")
+        assert response_cache.get(url) == ('"etag1"', "diff 1")
+        
+        # Storing again replaces the previous entry
+        response_cache.set(url, '"etag2"', "diff 2")
+        assert response_cache.get(url) == ('"etag2"', "diff 2")
+
+
+class TestAnalysisCache:
+    """
+    Test cases for the analysis cache.
+    """
+    
+    def test_make_key(self):
+        """
+        Test that keys depend on every part of the prompt.
+        """
+        key = AnalysisCache.make_key("gpt-4", "system", "user")
+        assert key == AnalysisCache.make_key("gpt-4", "system", "user")
+        assert key != AnalysisCache.make_key("gpt-4o", "system", "user")
+        assert key != AnalysisCache.make_key("gpt-4", "systemuser", "")
+        
+    def test_set_and_get(self, analysis_cache):
+        """
+        Test storing and looking up a cached response.
+        """
+        key = AnalysisCache.make_key("gpt-4", "system", "user")
+        assert analysis_cache.get(key) is None
+        
+        analysis_cache.set(key, '{"user_facing": false}')
+        assert analysis_cache.get(key) == '{"user_facing": false}'
+        
+    def test_expired_response(self, analysis_cache):
+        """
+        Test that responses older than the TTL are not used.
+        """
+        key = AnalysisCache.make_key("gpt-4", "system", "user")
+        
+        # Store a response 31 days in the past
+        with patch("src.cache.time.time", return_value=time.time() - 31 * 24 * 60 * 60):
+            analysis_cache.set(key, '{"user_facing": false}')
+            
+        assert analysis_cache.get(key) is None
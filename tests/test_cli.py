@@ -0,0 +1,140 @@
+"""
+Tests for the command-line interface module.
+"""
+
+import asyncio
+from datetime import datetime
+from unittest.mock import patch, MagicMock, AsyncMock
+
+import aiohttp
+import pytest
+from aioresponses import aioresponses
+
+from src.cli import _with_retry, analyze_repository
+from src.github_client import GitHubClient
+
+
+class TestWithRetry:
+    """
+    Test cases for retrying transient errors.
+    """
+    
+    async def test_retry_then_success(self):
+        """
+        Test that a transient error is retried until the call succeeds.
+        """
+        coro_factory = AsyncMock(side_effect=[aiohttp.ClientError("reset"), "ok"])
+        
+        with patch("asyncio.sleep", AsyncMock()) as mock_sleep:
+            result = await _with_retry(coro_factory, retries=2)
+            
+        assert result == "ok"
+        assert coro_factory.await_count == 2
+        mock_sleep.assert_awaited_once()
+        
+    async def test_retries_exhausted(self):
+        """
+        Test that the error is raised once the retries are used up.
+        """
+        coro_factory = AsyncMock(side_effect=aiohttp.ClientError("reset"))
+        
+        with patch("asyncio.sleep", AsyncMock()) as mock_sleep:
+            with pytest.raises(aiohttp.ClientError):
+                await _with_retry(coro_factory, retries=2)
+                
+        # One initial attempt plus two retries
+        assert coro_factory.await_count == 3
+        assert mock_sleep.await_count == 2
+        
+    async def test_retry_github_server_error(self):
+        """
+        Test that a GitHub 503 response is retried.
+        """
+        client = GitHubClient(token="test_token")
+        pr = {"number": 1, "diff_url": "https://api.github.com/repos/owner/repo/pulls/1"}
+        
+        try:
+            with aioresponses() as m, patch("asyncio.sleep", AsyncMock()) as mock_sleep:
+                # Mock the diff endpoint failing once before succeeding
+                m.get(pr["diff_url"], status=503, body="unavailable")
+                m.get(pr["diff_url"], status=200, body="mock diff")
+                
+                diff = await _with_retry(lambda: client.get_pr_diff(pr), retries=2)
+        finally:
+            await client.close()
+            
+        assert diff == "mock diff"
+        mock_sleep.assert_awaited_once()
+        
+    async def test_no_retry_on_other_errors(self):
+        """
+        Test that non-transient errors are raised without retrying.
+        """
+        coro_factory = AsyncMock(side_effect=ValueError("bad request"))
+        
+        with patch("asyncio.sleep", AsyncMock()) as mock_sleep:
+            with pytest.raises(ValueError):
+                await _with_retry(coro_factory, retries=2)
+                
+        assert coro_factory.await_count == 1
+        mock_sleep.assert_not_awaited()
+
+
+class TestAnalyzeRepository:
+    """
+    Test cases for analyzing a repository.
+    """
+    
+    async def test_failed_pr_kept_in_order(self):
+        """
+        Test that PRs are fetched concurrently and a failed PR keeps its place in the report.
+        """
+        prs = [
+            {"number": n, "title": f"PR {n}", "url": f"https://github.com/owner/repo/pull/{n}"}
+            for n in (1, 2, 3)
+        ]
+        
+        # PR 1 can only be fetched once PR 3 has been, so a sequential run would time out
+        pr3_fetched = asyncio.Event()
+        
+        async def get_pr_details(pr, metadata=None):
+            if pr["number"] == 1:
+                await asyncio.wait_for(pr3_fetched.wait(), timeout=1)
+            elif pr["number"] == 2:
+                raise ValueError("boom")
+            else:
+                pr3_fetched.set()
+            return pr
+            
+        github_client = MagicMock()
+        github_client.get_repository = AsyncMock(return_value={"full_name": "owner/repo"})
+        github_client.get_prs_since_date = AsyncMock(return_value=prs)
+        github_client.get_pr_metadata = AsyncMock(return_value={})
+        github_client.get_pr_details = get_pr_details
+        github_client.close = AsyncMock()
+        
+        openai_analyzer = MagicMock()
+        openai_analyzer.analyze_pr = AsyncMock(side_effect=lambda pr: f"analysis {pr['number']}")
+        openai_analyzer.error_result = MagicMock(side_effect=lambda pr, error: f"error {pr['number']}: {error}")
+        openai_analyzer.close = AsyncMock()
+        
+        report_generator = MagicMock()
+        report_generator.generate_report.return_value = "report.md"
+        
+        with patch("src.cli.validate_config", return_value={}), \
+                patch("src.github_client.GitHubClient", return_value=github_client), \
+                patch("src.openai_analyzer.OpenAIAnalyzer", return_value=openai_analyzer), \
+                patch("src.report_generator.ReportGenerator", return_value=report_generator):
+            report_path = await analyze_repository(
+                "https://github.com/owner/repo",
+                since_date=datetime(2023, 1, 1),
+                token="test_token",
+                use_cache=False
+            )
+            
+        # Assert that the failed PR is reported at its original position
+        assert report_path == "report.md"
+        analysis_results = report_generator.generate_report.call_args.args[2]
+        assert analysis_results == ["analysis 1", "error 2: boom", "analysis 3"]
+        github_client.close.assert_awaited_once()
+        openai_analyzer.close.assert_awaited_once()
@@ -3,13 +3,35 @@ Tests for the configuration module.
 """
 
 import os
-import unittest
 from unittest.mock import patch
 
-from src.config import get_github_config, get_openai_config, validate_config
+import pytest
 
+from src.config import (
+    get_cache_config,
+    get_github_config,
+    get_openai_config,
+    is_user_facing,
+    validate_config,
+)
 
-class TestConfig(unittest.TestCase):
+
+@pytest.fixture(autouse=True)
+def _clear_config_cache():
+    """
+    Clear cached configuration so each test reads its patched environment,
+    and don't leak configuration read from it into later tests.
+    """
+    get_openai_config.cache_clear()
+    get_github_config.cache_clear()
+    get_cache_config.cache_clear()
+    yield
+    get_openai_config.cache_clear()
+    get_github_config.cache_clear()
+    get_cache_config.cache_clear()
+
+
+class TestConfig:
     """
     Test cases for the configuration module.
     """
@@ -23,7 +45,7 @@ class TestConfig(unittest.TestCase):
         Test validating a valid configuration.
         """
         errors = validate_config()
-        self.assertEqual(errors, {})
+        assert errors == {}
         
     @patch.dict(os.environ, {
         "GITHUB_TOKEN": "",
@@ -34,7 +56,7 @@ class TestConfig(unittest.TestCase):
         Test validating a configuration with a missing GitHub token.
         """
         errors = validate_config()
-        self.assertIn("GITHUB_TOKEN", errors)
+        assert "GITHUB_TOKEN" in errors
         
     @patch.dict(os.environ, {
         "GITHUB_TOKEN": "test_token",
@@ -45,7 +67,7 @@ class TestConfig(unittest.TestCase):
         Test validating a configuration with a missing OpenAI API key.
         """
         errors = validate_config()
-        self.assertIn("OPENAI_API_KEY", errors)
+        assert "OPENAI_API_KEY" in errors
         
     @patch.dict(os.environ, {
         "GITHUB_TOKEN": "",
@@ -56,8 +78,8 @@ class TestConfig(unittest.TestCase):
         Test validating a configuration with all required values missing.
         """
         errors = validate_config()
-        self.assertIn("GITHUB_TOKEN", errors)
-        self.assertIn("OPENAI_API_KEY", errors)
+        assert "GITHUB_TOKEN" in errors
+        assert "OPENAI_API_KEY" in errors
         
     @patch.dict(os.environ, {
         "OPENAI_API_KEY": "test_api_key",
@@ -70,10 +92,10 @@ class TestConfig(unittest.TestCase):
         Test getting the OpenAI configuration.
         """
         config = get_openai_config()
-        self.assertEqual(config["api_key"], "test_api_key")
-        self.assertEqual(config["model"], "gpt-4")
-        self.assertEqual(config["max_tokens"], 1000)
-        self.assertEqual(config["temperature"], 0.5)
+        assert config.api_key == "test_api_key"
+        assert config.model == "gpt-4"
+        assert config.max_tokens == 1000
+        assert config.temperature == 0.5
         
     @patch.dict(os.environ, {
         "OPENAI_API_KEY": "test_api_key"
@@ -83,10 +105,10 @@ class TestConfig(unittest.TestCase):
         Test getting the OpenAI configuration with default values.
         """
         config = get_openai_config()
-        self.assertEqual(config["api_key"], "test_api_key")
-        self.assertEqual(config["model"], "gpt-4-turbo")
-        self.assertEqual(config["max_tokens"], 2000)
-        self.assertEqual(config["temperature"], 0.7)
+        assert config.api_key == "test_api_key"
+        assert config.model == "gpt-4-turbo"
+        assert config.max_tokens == 2000
+        assert config.temperature == 0.7
         
     @patch.dict(os.environ, {
         "GITHUB_TOKEN": "test_token",
@@ -97,8 +119,8 @@ class TestConfig(unittest.TestCase):
         Test getting the GitHub configuration.
         """
         config = get_github_config()
-        self.assertEqual(config["token"], "test_token")
-        self.assertEqual(config["api_url"], "https://github.example.com/api/v3")
+        assert config.token == "test_token"
+        assert config.api_url == "https://github.example.com/api/v3"
         
     @patch.dict(os.environ, {
         "GITHUB_TOKEN": "test_token"
@@ -108,9 +130,57 @@ class TestConfig(unittest.TestCase):
         Test getting the GitHub configuration with default values.
         """
         config = get_github_config()
-        self.assertEqual(config["token"], "test_token")
-        self.assertEqual(config["api_url"], "https://api.github.com")
-
-
-if __name__ == "__main__":
-    unittest.main()
+        assert config.token == "test_token"
+        assert config.api_url == "https://api.github.com"
+        
+    @patch.dict(os.environ, {
+        "GITHUB_TOKEN": "test_token"
+    }, clear=True)
+    def test_get_github_config_cached(self):
+        """
+        Test that the GitHub configuration is read from the environment once.
+        """
+        config = get_github_config()
+        os.environ["GITHUB_TOKEN"] = "other_token"
+        assert get_github_config() is config
+        assert get_github_config().token == "test_token"
+        
+    @patch.dict(os.environ, {
+        "DOCUPR_CACHE_DIR": "/tmp/docupr-cache"
+    }, clear=True)
+    def test_get_cache_config(self):
+        """
+        Test getting the cache configuration.
+        """
+        config = get_cache_config()
+        assert config.dir == "/tmp/docupr-cache"
+        
+    @patch.dict(os.environ, {
+        "HOME": "/home/test"
+    }, clear=True)
+    def test_get_cache_config_defaults(self):
+        """
+        Test getting the cache configuration with default values.
+        """
+        config = get_cache_config()
+        assert config.dir == "/home/test/.cache/docupr"
+        
+    def test_is_user_facing(self):
+        """
+        Test matching changed files against the user-facing patterns.
+        """
+        assert is_user_facing("docs/guide/install.md")
+        assert is_user_facing("README.md")
+        assert is_user_facing("docs/api/README.md")
+        assert is_user_facing("src/ui/components/button.tsx")
+        assert is_user_facing("config/settings.yaml")
+        assert not is_user_facing("src/github_client.py")
+        assert not is_user_facing("tests/test_config.py")
+        
+        # `**/` also matches no directories at all
+        assert is_user_facing("docs/image.png")
+        assert is_user_facing("src/ui/button.tsx")
+        
+        # `*` doesn't match across directories
+        assert not is_user_facing("config/nested/settings.yaml")
+        assert not is_user_facing("src/uix/button.tsx")
@@ -2,322 +2,331 @@
 Tests for the GitHub client module.
 """
 
-import asyncio
-import unittest
-from datetime import datetime
-from unittest.mock import patch, MagicMock
+import re
+from datetime import datetime, timezone
+from unittest.mock import patch, MagicMock, AsyncMock
 
+import aiohttp
 import pytest
-import github
-from github import Auth
+from aioresponses import aioresponses
 
+from src.config import GitHubConfig
 from src.github_client import GitHubClient
 
+# Timezone-aware dates shared by the release and search tests
+_JAN1_2023 = datetime(2023, 1, 1, tzinfo=timezone.utc)
 
-class TestGitHubClient(unittest.TestCase):
+
+class TestGitHubClient:
     """
     Test cases for the GitHub client.
     """
     
-    def setUp(self):
+    def test_graphql_url(self):
         """
-        Set up test fixtures.
+        Test the GraphQL endpoint for github.com.
         """
-        self.client = GitHubClient(token="test_token")
-        self.client.github = MagicMock()
+        client = GitHubClient(token="test_token")
+        client.config = GitHubConfig(token=None, api_url="https://api.github.com")
+        assert client._graphql_url() == "https://api.github.com/graphql"
         
-    def test_initialize_client(self):
+    def test_graphql_url_enterprise(self):
         """
-        Test initializing the GitHub client.
+        Test the GraphQL endpoint for GitHub Enterprise.
         """
-        # Reset the client to test initialization
-        self.client.github = None
-        
-        # Initialize the client
-        self.client.initialize_client()
-        
-        # Assert that the GitHub client was initialized
-        self.assertIsNotNone(self.client.github)
-        
-    def test_get_repository_full_url(self):
+        client = GitHubClient(token="test_token")
+        client.config = GitHubConfig(token=None, api_url="https://github.example.com/api/v3")
+        assert client._graphql_url() == "https://github.example.com/api/graphql"
+
+
+class TestGitHubClientAsync:
+    """
+    Async test cases for the GitHub client.
+    """
+    
+    @pytest.mark.parametrize(
+        "url",
+        [
+            "https://github.com/owner/repo",
+            "owner/repo",
+            "https://github.com/owner/repo.git",
+            "https://github.com/owner/repo/pull/12",
+            "https://github.com/owner/repo/tree/main",
+        ],
+        ids=["full_url", "short_url", "git_suffix", "pull_url", "tree_url"]
+    )
+    async def test_get_repository(self, gh_client, mock_repo, url):
         """
-        Test getting a repository by full URL.
+        Test getting a repository by full URL, short URL, URL with a .git suffix,
+        or URL of a page within the repository.
         """
-        # Mock the get_repo method
-        mock_repo = MagicMock()
-        self.client.github.get_repo.return_value = mock_repo
+        # Mock the REST call
+        gh_client._rest_get = AsyncMock(return_value=mock_repo)
         
-        # Test with a full URL
-        repo = self.client.get_repository("https://github.com/owner/repo")
+        repo = await gh_client.get_repository(url)
         
-        # Assert that get_repo was called with the correct arguments
-        self.client.github.get_repo.assert_called_once_with("owner/repo")
-        self.assertEqual(repo, mock_repo)
+        # Assert that the repository endpoint was requested
+        gh_client._rest_get.assert_awaited_once_with("/repos/owner/repo")
+        assert repo == mock_repo
         
-    def test_get_repository_short_url(self):
+    async def test_get_repository_invalid_url(self, gh_client):
         """
-        Test getting a repository by short URL.
+        Test getting a repository with an invalid URL.
         """
-        # Mock the get_repo method
-        mock_repo = MagicMock()
-        self.client.github.get_repo.return_value = mock_repo
-        
-        # Test with a short URL
-        repo = self.client.get_repository("owner/repo")
+        gh_client._rest_get = AsyncMock()
         
-        # Assert that get_repo was called with the correct arguments
-        self.client.github.get_repo.assert_called_once_with("owner/repo")
-        self.assertEqual(repo, mock_repo)
+        # Test with an invalid URL
+        with pytest.raises(ValueError):
+            await gh_client.get_repository("invalid_url")
+            
+        # A URL missing the repository name is rejected too
+        with pytest.raises(ValueError):
+            await gh_client.get_repository("https://github.com/owner")
+            
+        # Extra path segments are only accepted after a github.com URL
+        with pytest.raises(ValueError):
+            await gh_client.get_repository("owner/repo/extra")
+            
+        gh_client._rest_get.assert_not_awaited()
         
-    def test_get_repository_with_git_suffix(self):
+    @patch("aiohttp.ClientSession.get")
+    async def test_rest_get_not_modified(self, mock_get, gh_client):
         """
-        Test getting a repository with .git suffix.
+        Test that a 304 response reuses the cached body.
         """
-        # Mock the get_repo method
-        mock_repo = MagicMock()
-        self.client.github.get_repo.return_value = mock_repo
+        # Give the client a cache holding an earlier response
+        cache = MagicMock()
+        cache.get.return_value = ('"etag"', '{"full_name": "owner/repo"}')
+        gh_client.cache = cache
         
-        # Test with a URL that has a .git suffix
-        repo = self.client.get_repository("https://github.com/owner/repo.git")
+        # Mock a 304 response
+        mock_response = MagicMock()
+        mock_response.status = 304
+        mock_response.__aenter__.return_value = mock_response
+        mock_get.return_value = mock_response
         
-        # Assert that get_repo was called with the correct arguments
-        self.client.github.get_repo.assert_called_once_with("owner/repo")
-        self.assertEqual(repo, mock_repo)
+        # Make the request
+        data = await gh_client._rest_get("/repos/owner/repo")
         
-    def test_get_repository_invalid_url(self):
-        """
-        Test getting a repository with an invalid URL.
-        """
-        # Test with an invalid URL
-        with self.assertRaises(ValueError):
-            self.client.get_repository("invalid_url")
-
-
-@pytest.mark.asyncio
-class TestGitHubClientAsync:
-    """
-    Async test cases for the GitHub client.
-    """
+        # Assert that the ETag was sent and the cached body returned
+        headers = mock_get.call_args.kwargs["headers"]
+        assert headers["If-None-Match"] == '"etag"'
+        assert data == {"full_name": "owner/repo"}
+        cache.set.assert_not_called()
     
-    async def test_authenticate_with_token(self):
+    async def test_authenticate_with_token(self, gh_client):
         """
         Test authenticating with GitHub using a provided token.
         """
-        # Create a client with a mock token
-        client = GitHubClient(token="test_token")
-        
         # Authenticate with GitHub
-        token = await client.authenticate()
+        token = await gh_client.authenticate()
         
         # Assert that the token is correct
         assert token == "test_token"
         
-    async def test_authenticate_from_config(self):
+    async def test_authenticate_from_config(self, gh_client):
         """
         Test authenticating with GitHub using a token from config.
         """
-        # Create a client without a token
-        client = GitHubClient()
-        client.config = {"token": "config_token"}
+        # Drop the client's token so the config is used
+        gh_client.token = None
+        gh_client.config = GitHubConfig(token="config_token", api_url="https://api.github.com")
         
         # Authenticate with GitHub
-        token = await client.authenticate()
+        token = await gh_client.authenticate()
         
         # Assert that the token is correct
         assert token == "config_token"
         
-    async def test_authenticate_no_token(self):
+    async def test_authenticate_no_token(self, gh_client):
         """
         Test authenticating with GitHub with no token.
         """
-        # Create a client without a token
-        client = GitHubClient()
-        client.config = {"token": None}
+        # Drop the client's token and the configured one
+        gh_client.token = None
+        gh_client.config = GitHubConfig(token=None, api_url="https://api.github.com")
         
         # Authenticate with GitHub should raise an error
         with pytest.raises(ValueError):
-            await client.authenticate()
+            await gh_client.authenticate()
     
-    async def test_get_release_date(self):
+    @pytest.mark.parametrize(
+        "tag,release_count,expected",
+        [
+            (None, 1, _JAN1_2023),
+            (None, 0, None),
+            ("v1.0.0", 1, _JAN1_2023),
+        ],
+        ids=["latest", "no_releases", "with_tag"]
+    )
+    async def test_get_release_date(
+        self, gh_client, mock_repo, mock_release_jan2023, tag, release_count, expected
+    ):
         """
-        Test getting the release date.
+        Test getting the latest release date, or that of a specific tag.
         """
-        # Create a client with a mock token
-        client = GitHubClient(token="test_token")
-        client.github = MagicMock()
-        
-        # Mock the repository
-        mock_repo = MagicMock()
-        
-        # Mock the releases
-        mock_release = MagicMock()
-        mock_release.created_at = datetime(2023, 1, 1)
-        mock_releases = MagicMock()
-        mock_releases.totalCount = 1
-        mock_releases.__getitem__.return_value = mock_release
-        mock_repo.get_releases.return_value = mock_releases
-        
+        # Mock the single release for a tag, or the list of latest releases
+        if tag:
+            gh_client._rest_get = AsyncMock(return_value=mock_release_jan2023)
+        else:
+            gh_client._rest_get = AsyncMock(return_value=[mock_release_jan2023] * release_count)
+            
         # Get the release date
-        release_date = await client.get_release_date(mock_repo)
+        release_date = await gh_client.get_release_date(mock_repo, tag)
         
-        # Assert that the release date is correct
-        assert release_date == datetime(2023, 1, 1)
+        # Assert that the right endpoint was requested and the date is correct
+        if tag:
+            gh_client._rest_get.assert_awaited_once_with(f"/repos/owner/repo/releases/tags/{tag}")
+        else:
+            gh_client._rest_get.assert_awaited_once_with("/repos/owner/repo/releases", {"per_page": 1})
+        assert release_date == expected
         
-    async def test_get_release_date_no_releases(self):
+    async def test_get_prs_since_date(self, gh_client, mock_repo):
         """
-        Test getting the release date when there are no releases.
+        Test getting PRs since a specific date.
         """
-        # Create a client with a mock token
-        client = GitHubClient(token="test_token")
-        client.github = MagicMock()
-        
-        # Mock the repository
-        mock_repo = MagicMock()
-        
-        # Mock the releases
-        mock_releases = MagicMock()
-        mock_releases.totalCount = 0
-        mock_repo.get_releases.return_value = mock_releases
-        
-        # Get the release date
-        release_date = await client.get_release_date(mock_repo)
-        
-        # Assert that the release date is None
-        assert release_date is None
-        
-    async def test_get_release_date_with_tag(self):
+        # Mock the search results
+        gh_client._rest_get = AsyncMock(return_value={
+            "total_count": 3,
+            "items": [
+                {
+                    "number": 1,
+                    "title": "Add feature",
+                    "body": None,
+                    "html_url": "https://github.com/owner/repo/pull/1",
+                    "user": {"login": "testuser"},
+                    "closed_at": "2023-02-01T00:00:00Z",
+                    "pull_request": {
+                        "url": "https://api.github.com/repos/owner/repo/pulls/1",
+                        "merged_at": "2023-02-01T00:00:00Z"
+                    }
+                },
+                {
+                    "number": 2,
+                    "title": "Bump dependency",
+                    "html_url": "https://github.com/owner/repo/pull/2",
+                    "user": {"login": "dependabot[bot]"},
+                    "pull_request": {"url": "https://api.github.com/repos/owner/repo/pulls/2"}
+                },
+                {
+                    "number": 3,
+                    "title": "Fix bug",
+                    "body": "Fixes a bug",
+                    "html_url": "https://github.com/owner/repo/pull/3",
+                    "user": {"login": "testuser"},
+                    "closed_at": "2023-01-15T00:00:00Z",
+                    "pull_request": {"url": "https://api.github.com/repos/owner/repo/pulls/3"}
+                }
+            ]
+        })
+        
+        # Get PRs since a specific (timezone-aware) date
+        prs = await gh_client.get_prs_since_date(mock_repo, _JAN1_2023)
+        
+        # Assert that a single search request was made
+        gh_client._rest_get.assert_awaited_once()
+        path, params = gh_client._rest_get.call_args.args
+        assert path == "/search/issues"
+        assert "repo:owner/repo is:pr is:merged" in params["q"]
+        
+        # Assert that the search results were used as-is, minus Dependabot
+        assert [pr["number"] for pr in prs] == [1, 3]
+        assert prs[0] == {
+            "number": 1,
+            "title": "Add feature",
+            "body": "",
+            "url": "https://github.com/owner/repo/pull/1",
+            "author": "testuser",
+            "merged_at": "2023-02-01T00:00:00+00:00",
+            "diff_url": "https://api.github.com/repos/owner/repo/pulls/1",
+        }
+        assert prs[1]["merged_at"] == "2023-01-15T00:00:00+00:00"
+        
+    async def test_get_pr_diff(self, gh_client, mock_pr):
         """
-        Test getting the release date with a specific tag.
+        Test getting a PR diff.
         """
-        # Create a client with a mock token
-        client = GitHubClient(token="test_token")
-        client.github = MagicMock()
-        
-        # Mock the repository
-        mock_repo = MagicMock()
-        
-        # Mock the release
-        mock_release = MagicMock()
-        mock_release.created_at = datetime(2023, 1, 1)
-        mock_repo.get_release.return_value = mock_release
-        
-        # Get the release date with a tag
-        release_date = await client.get_release_date(mock_repo, "v1.0.0")
+        with aioresponses() as m:
+            # Mock the diff endpoint
+            m.get(mock_pr["diff_url"], status=200, body="mock diff")
+            
+            # Get the PR diff
+            diff = await gh_client.get_pr_diff(mock_pr)
         
-        # Assert that the release date is correct
-        assert release_date == datetime(2023, 1, 1)
+        # Assert that the diff is correct
+        assert diff == "mock diff"
         
-    async def test_get_prs_since_date(self):
+    async def test_get_pr_diff_server_error(self, gh_client, mock_pr):
         """
-        Test getting PRs since a specific date.
+        Test that a server error is raised as a retryable aiohttp error.
         """
-        # Create a client with a mock token
-        client = GitHubClient(token="test_token")
-        client.github = MagicMock()
-        
-        # Mock the repository
-        mock_repo = MagicMock()
-        
-        # Mock the search issues
-        mock_issue1 = MagicMock()
-        mock_issue1.number = 1
-        
-        mock_issue2 = MagicMock()
-        mock_issue2.number = 2
-        
-        mock_issues = [mock_issue1, mock_issue2]
-        client.github.search_issues.return_value = mock_issues
-        
-        # Import pytz for timezone-aware datetimes
-        import pytz
-        
-        # Mock the PRs with proper timezone-aware date objects
-        mock_pr1 = MagicMock()
-        mock_pr1.merged = True
-        mock_pr1.merged_at = pytz.UTC.localize(datetime(2023, 2, 1))
-        
-        mock_pr2 = MagicMock()
-        mock_pr2.merged = True
-        mock_pr2.merged_at = pytz.UTC.localize(datetime(2023, 1, 15))
-        
-        # Mock the get_pull method
-        mock_repo.get_pull.side_effect = lambda number: mock_pr1 if number == 1 else mock_pr2
-        
-        # Get PRs since a specific date (make it timezone-aware)
-        since_date = pytz.UTC.localize(datetime(2023, 1, 1))
-        prs = await client.get_prs_since_date(mock_repo, since_date)
-        
-        # Assert that the correct PRs were returned
-        assert len(prs) == 2
+        with aioresponses() as m:
+            # Mock the diff endpoint failing
+            m.get(mock_pr["diff_url"], status=503, body="unavailable")
+            
+            # Assert that the error can be told apart from a bad request
+            with pytest.raises(aiohttp.ClientResponseError) as exc_info:
+                await gh_client.get_pr_diff(mock_pr)
+                
+        assert exc_info.value.status == 503
         
     @patch("aiohttp.ClientSession.get")
-    async def test_get_pr_diff(self, mock_get):
+    async def test_get_pr_diff_truncated(self, mock_get, gh_client, mock_pr):
         """
-        Test getting a PR diff.
+        Test that a truncated PR diff stops reading once enough bytes arrived.
         """
-        # Create a client with a mock token
-        client = GitHubClient(token="test_token")
-        
-        # Mock the PR
-        mock_pr = MagicMock()
-        mock_pr.diff_url = "https://github.com/owner/repo/pull/1.diff"
-        
-        # Mock the response
+        # Mock a response body delivered in chunks
+        chunks_read = []
+        
+        async def mock_iter_chunked(size):
+            for chunk in (b"a" * 8, b"b" * 8, b"c" * 8):
+                chunks_read.append(chunk)
+                yield chunk
+                
         mock_response = MagicMock()
         mock_response.status = 200
-        
-        # Use async_mock instead of coroutine
-        async def mock_text():
-            return "mock diff"
-            
-        mock_response.text = mock_text
+        mock_response.content.iter_chunked = mock_iter_chunked
         mock_response.__aenter__.return_value = mock_response
-        
-        # Mock the session
-        mock_session = MagicMock()
-        mock_session.get.return_value = mock_response
-        mock_session.__aenter__.return_value = mock_session
-        
-        # Mock the ClientSession
         mock_get.return_value = mock_response
         
-        # Get the PR diff
-        diff = await client.get_pr_diff(mock_pr)
+        # Get the first 10 bytes of the PR diff
+        diff = await gh_client.get_pr_diff(mock_pr, max_bytes=10)
         
-        # Assert that the diff is correct
-        assert diff == "mock diff"
+        # Assert that the diff was truncated without reading the last chunk
+        assert diff == "aaaaaaaabb"
+        assert len(chunks_read) == 2
         
-    async def test_get_pr_details(self):
+    async def test_get_pr_diff_truncated_multibyte(self, gh_client, mock_pr):
         """
-        Test getting PR details.
+        Test that a character split by the byte limit is dropped.
         """
-        # Create a client with a mock token
-        client = GitHubClient(token="test_token")
+        with aioresponses() as m:
+            # Mock a response body where the limit falls inside "é"
+            m.get(mock_pr["diff_url"], status=200, body="abé".encode("utf-8"))
+            
+            diff = await gh_client.get_pr_diff(mock_pr, max_bytes=3)
         
-        # Mock the PR
-        mock_pr = MagicMock()
-        mock_pr.number = 1
-        mock_pr.title = "Test PR"
-        mock_pr.body = "Test body"
-        mock_pr.html_url = "https://github.com/owner/repo/pull/1"
-        mock_pr.user.login = "testuser"
-        mock_pr.merged_at = datetime(2023, 1, 1)
-        
-        # Mock the files
-        mock_file1 = MagicMock()
-        mock_file1.filename = "file1.py"
-        mock_file2 = MagicMock()
-        mock_file2.filename = "file2.py"
-        mock_pr.get_files.return_value = [mock_file1, mock_file2]
+        assert diff == "ab"
         
+    async def test_get_pr_details(self, gh_client, mock_pr_merged):
+        """
+        Test getting PR details.
+        """
         # Mock the get_pr_diff method
-        async def mock_get_pr_diff(pr):
-            return "mock diff"
+        async def mock_get_pr_diff(pr, max_bytes=None):
+            return (
+                "diff --git a/file1.py b/file1.py\n"
+                "--- a/file1.py\n"
+                "+++ b/file1.py\n"
+                "diff --git a/old.py b/file2.py\n"
+                "rename from old.py\n"
+                "rename to file2.py\n"
+            )
             
-        client.get_pr_diff = mock_get_pr_diff
+        gh_client.get_pr_diff = mock_get_pr_diff
         
         # Get the PR details
-        details = await client.get_pr_details(mock_pr)
+        details = await gh_client.get_pr_details(mock_pr_merged)
         
         # Assert that the details are correct
         assert details["number"] == 1
@@ -326,9 +335,92 @@ class TestGitHubClientAsync:
         assert details["url"] == "https://github.com/owner/repo/pull/1"
         assert details["author"] == "testuser"
         assert details["merged_at"] == "2023-01-01T00:00:00"
+        assert details["diff"].startswith("diff --git a/file1.py b/file1.py")
+        assert details["changed_files"] == ["file1.py", "file2.py"]
+        
+    async def test_get_pr_details_with_metadata(self, gh_client, mock_pr):
+        """
+        Test getting PR details from batched GraphQL metadata.
+        """
+        # GraphQL node for the PR
+        metadata = {
+            "number": 1,
+            "title": "Test PR",
+            "body": None,
+            "url": "https://github.com/owner/repo/pull/1",
+            "author": {"login": "testuser"},
+            "mergedAt": "2023-01-01T00:00:00Z",
+            "files": {"nodes": [{"path": "file1.py"}, {"path": "file2.py"}]}
+        }
+        
+        # Mock the get_pr_diff method
+        async def mock_get_pr_diff(pr, max_bytes=None):
+            return "mock diff"
+            
+        gh_client.get_pr_diff = mock_get_pr_diff
+        
+        # Get the PR details
+        details = await gh_client.get_pr_details(mock_pr, metadata)
+        
+        # Assert that the details come from the metadata
+        assert details["number"] == 1
+        assert details["body"] == ""
+        assert details["author"] == "testuser"
+        assert details["merged_at"] == "2023-01-01T00:00:00+00:00"
         assert details["diff"] == "mock diff"
         assert details["changed_files"] == ["file1.py", "file2.py"]
-
-
-if __name__ == "__main__":
-    unittest.main()
+        
+    async def test_get_pr_details_with_truncated_files(self, gh_client, mock_pr):
+        """
+        Test that changed files are read from the full diff when GraphQL truncates them.
+        """
+        # GraphQL node whose file list has more pages
+        metadata = {
+            "number": 1,
+            "title": "Test PR",
+            "body": "Test body",
+            "url": "https://github.com/owner/repo/pull/1",
+            "author": {"login": "testuser"},
+            "mergedAt": "2023-01-01T00:00:00Z",
+            "files": {"nodes": [{"path": "file1.py"}], "pageInfo": {"hasNextPage": True}}
+        }
+        
+        # Mock the get_pr_diff method, recording the byte limit
+        limits = []
+        
+        async def mock_get_pr_diff(pr, max_bytes=None):
+            limits.append(max_bytes)
+            return (
+                "diff --git a/file1.py b/file1.py\n"
+                "diff --git a/file2.py b/file2.py\n"
+            )
+            
+        gh_client.get_pr_diff = mock_get_pr_diff
+        
+        # Get the PR details
+        details = await gh_client.get_pr_details(mock_pr, metadata)
+        
+        # Assert that the whole diff was fetched and every file listed
+        assert limits == [None]
+        assert details["changed_files"] == ["file1.py", "file2.py"]
+        
+    async def test_get_pr_metadata(self, gh_client, mock_repo):
+        """
+        Test batching PR metadata lookups into GraphQL queries.
+        """
+        # Mock the GraphQL call, echoing one node per aliased PR
+        queries = []
+        
+        async def mock_graphql(query, variables):
+            queries.append(query)
+            numbers = [int(n) for n in re.findall(r"\bpr(\d+):", query)]
+            return {"repository": {f"pr{n}": {"number": n} for n in numbers}}
+            
+        gh_client._graphql = mock_graphql
+        
+        # Get metadata for more PRs than fit in one batch
+        metadata = await gh_client.get_pr_metadata(mock_repo, list(range(1, 31)))
+        
+        # Assert that the PRs were fetched in two batches
+        assert len(queries) == 2
+        assert sorted(metadata) == list(range(1, 31))
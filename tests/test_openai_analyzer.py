@@ -2,182 +2,386 @@
 Tests for the OpenAI analyzer module.
 """
 
+import asyncio
 import json
-import unittest
+from types import MappingProxyType, SimpleNamespace
 from unittest.mock import patch, MagicMock, AsyncMock
 
 import pytest
+from aiolimiter import AsyncLimiter
 
 from src.openai_analyzer import OpenAIAnalyzer
+from src.schemas import DocsImpactStruct
+
+# Shared, read-only PR details and model responses
+_PR_DETAILS = MappingProxyType({
+    "number": 1,
+    "title": "Add new feature",
+    "body": "This PR adds a new feature",
+    "url": "https://github.com/owner/repo/pull/1",
+    "author": "testuser",
+    "merged_at": "2023-01-01T00:00:00",
+    "diff": "mock diff",
+    "changed_files": ["src/feature.py"]
+})
+
+_API_PR_DETAILS = MappingProxyType({
+    "number": 1,
+    "title": "Update API",
+    "body": "This PR updates the API",
+    "url": "https://github.com/owner/repo/pull/1",
+    "author": "testuser",
+    "merged_at": "2023-01-01T00:00:00",
+    "diff": "mock diff",
+    "changed_files": ["src/api.py"]
+})
+
+_GOOD_RESPONSE_JSON = json.dumps({
+    "user_facing": True,
+    "docs_impact": {
+        "update_existing": ["docs/api.md"],
+        "create_new": ["docs/new-feature.md"],
+        "suggested_content": ["Add section on new authentication flow"]
+    },
+    "reasoning": "This PR adds a new feature that users will interact with"
+})
+
+_API_RESPONSE_JSON = json.dumps({
+    "user_facing": True,
+    "docs_impact": {
+        "update_existing": ["docs/api.md"],
+        "create_new": [],
+        "suggested_content": []
+    },
+    "reasoning": "This PR updates the API"
+})
+
+# (pr_details, response, expected result fields) for test_analyze_pr
+_ANALYZE_PR_CASES = [
+    pytest.param(
+        _PR_DETAILS,
+        _GOOD_RESPONSE_JSON,
+        {
+            "user_facing": True,
+            "docs_impact": DocsImpactStruct(
+                update_existing=["docs/api.md"],
+                create_new=["docs/new-feature.md"],
+                suggested_content=["Add section on new authentication flow"]
+            ),
+            "error": None
+        },
+        id="success"
+    ),
+    pytest.param(
+        _PR_DETAILS,
+        "This is not valid JSON",
+        {"user_facing": True, "reasoning": "Extracted from non-JSON response", "error": None},
+        id="json_error"
+    ),
+    pytest.param(
+        _PR_DETAILS,
+        Exception("API error"),
+        {"user_facing": False, "error": "API error"},
+        id="api_error"
+    ),
+    pytest.param(
+        _API_PR_DETAILS,
+        "Here's my analysis:\n\n```json\n" + _API_RESPONSE_JSON + "\n```\n",
+        {"user_facing": True, "docs_impact": DocsImpactStruct(update_existing=["docs/api.md"])},
+        id="json_extraction"
+    ),
+]
+
+
+@pytest.fixture(autouse=True, scope="module")
+def _patch_openai():
+    """
+    Stub out the OpenAI and HTTP/2 clients built by every OpenAIAnalyzer.
+    
+    No test here talks to OpenAI, so there is no need to pay for an SSL
+    context and connection pool per analyzer, or to have an API key set.
+    """
+    with patch("src.openai_analyzer.AsyncOpenAI", return_value=MagicMock()), \
+            patch("httpx.AsyncClient", return_value=MagicMock()):
+        yield
+
+
+# Rate limiter mock shared by every analyzer from _fresh_analyzer
+_RATE_LIMIT = AsyncMock()
+
+
+def _fresh_analyzer(response=None, error=None, cache=None):
+    """
+    Create an analyzer with rate limiting and the OpenAI request mocked out.
+    
+    Args:
+        response (Optional[str]): Response text returned for the request
+        error (Optional[Exception]): Exception raised by the request instead
+        cache (Optional[AnalysisCache]): Cache passed to the analyzer
+        
+    Returns:
+        OpenAIAnalyzer: Analyzer whose `_get_openai_response` is an AsyncMock
+    """
+    analyzer = OpenAIAnalyzer(cache=cache)
+    _RATE_LIMIT.reset_mock()
+    analyzer._rate_limit = _RATE_LIMIT
+    
+    mock_response = AsyncMock()
+    if error is not None:
+        mock_response.side_effect = error
+    else:
+        mock_response.return_value = response
+    analyzer._get_openai_response = mock_response
+    return analyzer
 
 
-@pytest.mark.asyncio
 class TestOpenAIAnalyzer:
     """
     Test cases for the OpenAI analyzer.
     """
     
-    async def test_analyze_pr_success(self):
+    @pytest.mark.parametrize("pr_details,response,expected", _ANALYZE_PR_CASES)
+    async def test_analyze_pr(self, pr_details, response, expected):
         """
-        Test analyzing a PR successfully.
+        Test analyzing a PR for each kind of OpenAI response.
         """
-        # Create the analyzer
-        analyzer = OpenAIAnalyzer()
+        # Mock the OpenAI request, raising if the case is an error
+        if isinstance(response, Exception):
+            analyzer = _fresh_analyzer(error=response)
+        else:
+            analyzer = _fresh_analyzer(response)
+            
+        result = await analyzer.analyze_pr(pr_details)
         
-        # Mock the rate limit method
-        analyzer._rate_limit = AsyncMock()
+        # Assert that the PR metadata was attached
+        assert result.pr_number == pr_details["number"]
+        assert result.pr_title == pr_details["title"]
+        assert result.pr_url == pr_details["url"]
         
-        # Mock the _get_openai_response method
-        analyzer._get_openai_response = AsyncMock(return_value=json.dumps({
-            "user_facing": True,
-            "docs_impact": {
-                "update_existing": ["docs/api.md"],
-                "create_new": ["docs/new-feature.md"],
-                "suggested_content": ["Add section on new authentication flow"]
-            },
-            "reasoning": "This PR adds a new feature that users will interact with"
-        }))
+        # Assert that the analysis fields are correct
+        for field, value in expected.items():
+            assert getattr(result, field) == value
+        
+    async def test_analyze_pr_cached(self):
+        """
+        Test analyzing a PR whose prompt is already cached.
+        """
+        # Create the analyzer with a cache that already holds the response
+        cache = MagicMock()
+        cache.get.return_value = _API_RESPONSE_JSON
+        analyzer = _fresh_analyzer(cache=cache)
         
         # Analyze a PR
-        pr_details = {
-            "number": 1,
-            "title": "Add new feature",
-            "body": "This PR adds a new feature",
-            "url": "https://github.com/owner/repo/pull/1",
-            "author": "testuser",
-            "merged_at": "2023-01-01T00:00:00",
-            "diff": "mock diff",
-            "changed_files": ["src/feature.py"]
-        }
+        result = await analyzer.analyze_pr(_API_PR_DETAILS)
         
-        result = await analyzer.analyze_pr(pr_details)
+        # Assert that OpenAI was not called and the cached result was used
+        analyzer._get_openai_response.assert_not_awaited()
+        analyzer._rate_limit.assert_not_awaited()
+        cache.set.assert_not_called()
+        assert result.user_facing is True
+        assert "docs/api.md" in result.docs_impact.update_existing
+        assert result.pr_number == 1
+        
+    @pytest.mark.parametrize(
+        "response,cached",
+        [
+            (_API_RESPONSE_JSON, True),
+            ("This is not valid JSON", False),
+            (_API_RESPONSE_JSON[:20], False),
+        ],
+        ids=["valid", "json_error", "truncated"]
+    )
+    async def test_analyze_pr_caches_valid_responses(self, response, cached):
+        """
+        Test that only responses that are valid analysis objects are cached.
+        """
+        # Create the analyzer with an empty cache
+        cache = MagicMock()
+        cache.get.return_value = None
+        analyzer = _fresh_analyzer(response, cache=cache)
+        
+        await analyzer.analyze_pr(_API_PR_DETAILS)
         
-        # Assert that the result is correct
-        assert result["user_facing"] is True
-        assert "docs/api.md" in result["docs_impact"]["update_existing"]
-        assert "docs/new-feature.md" in result["docs_impact"]["create_new"]
-        assert "Add section on new authentication flow" in result["docs_impact"]["suggested_content"]
-        assert result["pr_number"] == 1
-        assert result["pr_title"] == "Add new feature"
-        assert result["pr_url"] == "https://github.com/owner/repo/pull/1"
+        # Assert that fallback results aren't stored to be replayed later
+        if cached:
+            cache.set.assert_called_once()
+            assert cache.set.call_args.args[1] == response
+        else:
+            cache.set.assert_not_called()
         
-    async def test_analyze_pr_json_error(self):
+    async def test_rate_limit_waits_when_limit_reached(self):
         """
-        Test analyzing a PR with a JSON error.
+        Test that the rate limiter waits once the limit is used up.
         """
-        # Create the analyzer
+        # Create the analyzer with a limit of one request a minute
         analyzer = OpenAIAnalyzer()
+        analyzer._limiter = AsyncLimiter(1, 60)
         
-        # Mock the rate limit method
-        analyzer._rate_limit = AsyncMock()
+        # The first request goes through immediately
+        await asyncio.wait_for(analyzer._rate_limit(), timeout=1)
         
-        # Mock the _get_openai_response method
-        analyzer._get_openai_response = AsyncMock(return_value="This is not valid JSON")
+        # The second one has to wait for capacity
+        with pytest.raises(asyncio.TimeoutError):
+            await asyncio.wait_for(analyzer._rate_limit(), timeout=0.05)
+            
+    async def test_rate_limit_no_wait(self):
+        """
+        Test that the rate limiter doesn't wait while there is capacity.
+        """
+        # Create the analyzer with room for two requests
+        analyzer = OpenAIAnalyzer()
+        analyzer._limiter = AsyncLimiter(2, 60)
+        
+        await asyncio.wait_for(analyzer._rate_limit(), timeout=1)
+        
+        # Assert that there is still room for another request
+        assert analyzer._limiter.has_capacity()
+        
+    async def test_analyze_pr_user_message(self):
+        """
+        Test the user message sent to OpenAI.
+        """
+        # Create the analyzer
+        analyzer = _fresh_analyzer("{}")
         
         # Analyze a PR
-        pr_details = {
-            "number": 1,
-            "title": "Add new feature",
-            "body": "This PR adds a new feature",
-            "url": "https://github.com/owner/repo/pull/1",
-            "author": "testuser",
-            "merged_at": "2023-01-01T00:00:00",
-            "diff": "mock diff",
-            "changed_files": ["src/feature.py"]
-        }
+        pr_details = {**_API_PR_DETAILS, "changed_files": ["src/api.py", "docs/api.md"]}
         
-        result = await analyzer.analyze_pr(pr_details)
+        await analyzer.analyze_pr(pr_details)
         
-        # Assert that the result contains default values
-        assert "pr_number" in result
-        assert "pr_title" in result
-        assert "pr_url" in result
-        assert "user_facing" in result
-        assert "docs_impact" in result
+        # Assert that the PR details made it into the message
+        user_message = analyzer._get_openai_response.call_args.args[1]
+        assert user_message.startswith("Pull Request #1: Update API\n")
+        assert "This PR updates the API" in user_message
+        assert '["src/api.py","docs/api.md"]' in user_message
+        assert "```diff\nmock diff\n```" in user_message
         
-    async def test_analyze_pr_api_error(self):
+        # Assert that the prebuilt system prompt was sent
+        assert analyzer._get_openai_response.call_args.args[0] is analyzer._system_prompt
+
+    async def test_parse_openai_response_coerced_types(self):
         """
-        Test analyzing a PR with an API error.
+        Test that loosely typed responses still validate through Pydantic.
         """
-        # Create the analyzer
         analyzer = OpenAIAnalyzer()
         
-        # Mock the rate limit method
-        analyzer._rate_limit = AsyncMock()
+        # msgspec rejects a string boolean; Pydantic coerces it
+        result = analyzer._parse_openai_response(json.dumps({
+            "user_facing": "true",
+            "docs_impact": {"update_existing": ["docs/api.md"]},
+            "reasoning": "Changes the public API"
+        }))
         
-        # Mock the _get_openai_response method to raise an exception
-        analyzer._get_openai_response = AsyncMock(side_effect=Exception("API error"))
+        assert result.user_facing is True
+        assert result.docs_impact.update_existing == ["docs/api.md"]
+        assert result.docs_impact.create_new == []
+        assert result.reasoning == "Changes the public API"
         
-        # Analyze a PR
-        pr_details = {
-            "number": 1,
-            "title": "Add new feature",
-            "body": "This PR adds a new feature",
-            "url": "https://github.com/owner/repo/pull/1",
-            "author": "testuser",
-            "merged_at": "2023-01-01T00:00:00",
-            "diff": "mock diff",
-            "changed_files": ["src/feature.py"]
-        }
+    async def test_parse_openai_response_markdown(self):
+        """
+        Test extracting JSON from a markdown code block.
+        """
+        analyzer = OpenAIAnalyzer()
         
-        result = await analyzer.analyze_pr(pr_details)
+        content = (
+            "Here is my analysis:\n```json\n"
+            '{"user_facing": false, "docs_impact": {}, "reasoning": "Internal refactor"}'
+            "\n```\nLet me know if you need more."
+        )
+        result = analyzer._parse_openai_response(content)
         
-        # Assert that the result contains error information
-        assert result["pr_number"] == 1
-        assert result["pr_title"] == "Add new feature"
-        assert result["pr_url"] == "https://github.com/owner/repo/pull/1"
-        assert result["user_facing"] is False
-        assert "error" in result
-        assert "API error" in result["error"]
+        assert result.user_facing is False
+        assert result.reasoning == "Internal refactor"
         
-    async def test_analyze_pr_json_extraction(self):
+    async def test_parse_openai_response_prose(self):
         """
-        Test analyzing a PR with JSON extraction.
+        Test salvaging documentation sentences from a prose response.
         """
-        # Create the analyzer
         analyzer = OpenAIAnalyzer()
         
-        # Mock the rate limit method
-        analyzer._rate_limit = AsyncMock()
+        content = (
+            "This PR changes the CLI. The Documentation should mention the new flag. "
+            "Nothing else changes."
+        )
+        result = analyzer._parse_openai_response(content)
         
-        # Mock the _get_openai_response method
-        analyzer._get_openai_response = AsyncMock(return_value="""
-        Here's my analysis:
+        assert result.user_facing is True
+        assert result.docs_impact.suggested_content == [
+            "The Documentation should mention the new flag."
+        ]
         
-        ```json
-        {
-            "user_facing": true,
-            "docs_impact": {
-                "update_existing": ["docs/api.md"],
-                "create_new": [],
-                "suggested_content": []
+        # The shared default result must not be modified
+        assert analyzer._parse_openai_response("No JSON here").docs_impact.suggested_content == []
+        
+    async def test_analyze_prs_batch(self):
+        """
+        Test analyzing PRs with the Batch API.
+        """
+        # Create the analyzer
+        analyzer = OpenAIAnalyzer()
+        
+        # Mock the batch endpoints
+        output_lines = [
+            {
+                "custom_id": "pr-1",
+                "response": {
+                    "status_code": 200,
+                    "body": {"choices": [{"message": {"content": json.dumps({
+                        "user_facing": True,
+                        "docs_impact": {"update_existing": ["docs/api.md"]},
+                        "reasoning": "Changes the public API"
+                    })}}]}
+                },
+                "error": None
             },
-            "reasoning": "This PR updates the API"
-        }
-        ```
-        """)
+            {
+                "custom_id": "pr-2",
+                "response": None,
+                "error": {"code": "server_error", "message": "Internal error"}
+            }
+        ]
+        # Only the endpoint calls are tracked; their results are plain data
+        analyzer.client = SimpleNamespace(
+            files=SimpleNamespace(
+                create=AsyncMock(return_value=SimpleNamespace(id="file-in")),
+                content=AsyncMock(return_value=SimpleNamespace(
+                    content="\n".join(json.dumps(line) for line in output_lines).encode()
+                ))
+            ),
+            batches=SimpleNamespace(
+                create=AsyncMock(return_value=SimpleNamespace(id="batch-1", status="in_progress")),
+                retrieve=AsyncMock(return_value=SimpleNamespace(
+                    id="batch-1", status="completed", output_file_id="file-out"
+                ))
+            )
+        )
         
-        # Analyze a PR
-        pr_details = {
-            "number": 1,
-            "title": "Update API",
-            "body": "This PR updates the API",
-            "url": "https://github.com/owner/repo/pull/1",
-            "author": "testuser",
-            "merged_at": "2023-01-01T00:00:00",
-            "diff": "mock diff",
-            "changed_files": ["src/api.py"]
-        }
+        # Analyze two PRs
+        pr_details_list = [
+            {
+                "number": n,
+                "title": f"PR {n}",
+                "body": "",
+                "url": f"https://github.com/owner/repo/pull/{n}",
+                "diff": "mock diff",
+                "changed_files": ["src/api.py"]
+            }
+            for n in (1, 2)
+        ]
         
-        result = await analyzer.analyze_pr(pr_details)
+        with patch("src.openai_analyzer.asyncio.sleep", AsyncMock()):
+            results = await analyzer.analyze_prs_batch(pr_details_list)
+            
+        # Assert that one request per PR was uploaded
+        upload = analyzer.client.files.create.call_args.kwargs
+        assert upload["purpose"] == "batch"
+        lines = upload["file"][1].splitlines()
+        assert [json.loads(line)["custom_id"] for line in lines] == ["pr-1", "pr-2"]
         
-        # Assert that the result is correct
-        assert result["user_facing"] is True
-        assert "docs/api.md" in result["docs_impact"]["update_existing"]
-        assert result["pr_number"] == 1
-        assert result["pr_title"] == "Update API"
-        assert result["pr_url"] == "https://github.com/owner/repo/pull/1"
-
-
-if __name__ == "__main__":
-    unittest.main()
+        # Assert that results are in order and failures are marked
+        assert results[0].pr_number == 1
+        assert results[0].user_facing is True
+        assert results[0].docs_impact.update_existing == ["docs/api.md"]
+        assert results[1].pr_number == 2
+        assert results[1].user_facing is False
+        assert "server_error" in results[1].error
@@ -2,185 +2,252 @@
 Tests for the report generator module.
 """
 
-import json
 import os
-import tempfile
-import unittest
+import re
 from datetime import datetime
-from unittest.mock import patch, MagicMock
+
+import orjson
+import pytest
 
 from src.report_generator import ReportGenerator
+from src.schemas import DocsImpactStruct, PRAnalysis
+
+# Sample PR analysis results
+_REPO_URL = "https://github.com/owner/repo"
+_SINCE_DATE = datetime(2023, 1, 1)
+_GENERATED_AT = datetime(2023, 2, 1, 12, 30, 0)
+_ANALYSIS_RESULTS = [
+    PRAnalysis(
+        pr_number=1,
+        pr_title="Add new feature",
+        pr_url="https://github.com/owner/repo/pull/1",
+        user_facing=True,
+        docs_impact=DocsImpactStruct(
+            update_existing=["docs/api.md"],
+            create_new=["docs/new-feature.md"],
+            suggested_content=["Add section on new authentication flow"]
+        ),
+        reasoning="This PR adds a new feature that users will interact with"
+    ),
+    PRAnalysis(
+        pr_number=2,
+        pr_title="Fix bug",
+        pr_url="https://github.com/owner/repo/pull/2",
+        user_facing=False,
+        docs_impact=DocsImpactStruct(),
+        reasoning="This PR fixes an internal bug with no user-facing changes"
+    ),
+    PRAnalysis(
+        pr_number=3,
+        pr_title="Update UI",
+        pr_url="https://github.com/owner/repo/pull/3",
+        user_facing=True,
+        docs_impact=DocsImpactStruct(
+            update_existing=["docs/ui.md"],
+            suggested_content=["Update screenshots in UI documentation"]
+        ),
+        reasoning="This PR updates the UI that users interact with"
+    )
+]
+
+# Analysis results with no user-facing changes
+_NO_USER_FACING_RESULTS = [
+    PRAnalysis(
+        pr_number=1,
+        pr_title="Fix bug",
+        pr_url="https://github.com/owner/repo/pull/1",
+        user_facing=False,
+        docs_impact=DocsImpactStruct(),
+        reasoning="This PR fixes an internal bug with no user-facing changes"
+    )
+]
+
+# Text the markdown report must and must not contain for _ANALYSIS_RESULTS
+_REPORT_HEADER = (
+    "# Documentation Update Report for https://github.com/owner/repo",
+    "Generated on: 2023-02-01 12:30:00",
+    "Analyzing PRs since: 2023-01-01",
+    "Total PRs analyzed: 3",
+    "PRs with user-facing changes: 2",
+)
+_REPORT_SECTIONS = (
+    "### Existing Documentation to Update",
+    "- docs/api.md",
+    "- docs/ui.md",
+    "### New Documentation to Create",
+    "- docs/new-feature.md",
+    "### Suggested Content Updates",
+    "- PR #1: Add section on new authentication flow",
+    "- PR #3: Update screenshots in UI documentation",
+    "### PR #1: Add new feature",
+    "### PR #3: Update UI",
+)
+_REPORT_FORBIDDEN = ("### PR #2: Fix bug",)
+
+# Text the markdown report must and must not contain for _NO_USER_FACING_RESULTS
+_NO_USER_FACING_REQUIRED = (
+    "# Documentation Update Report for https://github.com/owner/repo",
+    "Total PRs analyzed: 1",
+    "PRs with user-facing changes: 0",
+    "No user-facing changes detected in the analyzed PRs.",
+)
+_NO_USER_FACING_FORBIDDEN = (
+    "### Existing Documentation to Update",
+    "### New Documentation to Create",
+    "### Suggested Content Updates",
+)
+
+
+def _any_of(texts):
+    """
+    Compile a regex matching any of the given literal texts.
+    
+    Args:
+        texts (Tuple[str, ...]): Texts to match
+        
+    Returns:
+        re.Pattern: Alternation of the escaped texts
+    """
+    return re.compile("|".join(re.escape(text) for text in texts))
+
+
+# Compiled once so each test scans the report a single time
+_REPORT_HEADER_RE = _any_of(_REPORT_HEADER)
+_REPORT_SECTIONS_RE = _any_of(_REPORT_SECTIONS)
+_REPORT_FORBIDDEN_RE = _any_of(_REPORT_FORBIDDEN)
+_NO_USER_FACING_REQUIRED_RE = _any_of(_NO_USER_FACING_REQUIRED)
+_NO_USER_FACING_FORBIDDEN_RE = _any_of(_NO_USER_FACING_FORBIDDEN)
+
+
+@pytest.fixture
+def generator(tmp_path):
+    """
+    Report generator writing to a temporary directory, with a frozen clock.
+    """
+    return ReportGenerator(str(tmp_path), clock=lambda: _GENERATED_AT)
+
+
+@pytest.fixture(scope="module")
+def rendered_report(tmp_path_factory):
+    """
+    Markdown report for _ANALYSIS_RESULTS, generated once for the module.
+    
+    Returns:
+        Tuple[str, str]: Path to the report and its content
+    """
+    generator = ReportGenerator(str(tmp_path_factory.mktemp("report")), clock=lambda: _GENERATED_AT)
+    report_path = generator.generate_report(_REPO_URL, _SINCE_DATE, _ANALYSIS_RESULTS)
+    with open(report_path, "r") as f:
+        return report_path, f.read()
 
 
-class TestReportGenerator(unittest.TestCase):
+class TestReportGenerator:
     """
     Test cases for the report generator.
     """
     
-    def setUp(self):
+    def test_output_dir_created_on_write(self, tmp_path):
         """
-        Set up test fixtures.
+        Test that the output directory is only created when a report is written.
         """
-        # Create a temporary directory for test reports
-        self.test_dir = tempfile.mkdtemp()
-        self.generator = ReportGenerator(self.test_dir)
+        output_dir = tmp_path / "reports"
+        generator = ReportGenerator(str(output_dir))
+        assert not output_dir.exists()
         
-        # Sample PR analysis results
-        self.repo_url = "https://github.com/owner/repo"
-        self.since_date = datetime(2023, 1, 1)
-        self.analysis_results = [
-            {
-                "pr_number": 1,
-                "pr_title": "Add new feature",
-                "pr_url": "https://github.com/owner/repo/pull/1",
-                "user_facing": True,
-                "docs_impact": {
-                    "update_existing": ["docs/api.md"],
-                    "create_new": ["docs/new-feature.md"],
-                    "suggested_content": ["Add section on new authentication flow"]
-                },
-                "reasoning": "This PR adds a new feature that users will interact with"
-            },
-            {
-                "pr_number": 2,
-                "pr_title": "Fix bug",
-                "pr_url": "https://github.com/owner/repo/pull/2",
-                "user_facing": False,
-                "docs_impact": {
-                    "update_existing": [],
-                    "create_new": [],
-                    "suggested_content": []
-                },
-                "reasoning": "This PR fixes an internal bug with no user-facing changes"
-            },
-            {
-                "pr_number": 3,
-                "pr_title": "Update UI",
-                "pr_url": "https://github.com/owner/repo/pull/3",
-                "user_facing": True,
-                "docs_impact": {
-                    "update_existing": ["docs/ui.md"],
-                    "create_new": [],
-                    "suggested_content": ["Update screenshots in UI documentation"]
-                },
-                "reasoning": "This PR updates the UI that users interact with"
-            }
-        ]
+        report_path = generator.generate_report(_REPO_URL, _SINCE_DATE, [])
+        assert os.path.exists(report_path)
         
-    def tearDown(self):
+    def test_generate_report(self, rendered_report):
         """
-        Clean up test fixtures.
+        Test that the markdown report file is written.
         """
-        # Clean up temporary directory
-        for file in os.listdir(self.test_dir):
-            os.remove(os.path.join(self.test_dir, file))
-        os.rmdir(self.test_dir)
+        report_path, _ = rendered_report
+        assert os.path.exists(report_path)
+        assert os.path.basename(report_path) == "docupr_repo_20230201_123000.md"
         
-    def test_generate_report(self):
+    def test_report_name_from_pull_url(self, generator):
         """
-        Test generating a markdown report.
+        Test that the report is named after the repository, not the end of the URL.
         """
-        # Generate the report
-        report_path = self.generator.generate_report(
-            self.repo_url,
-            self.since_date,
-            self.analysis_results
-        )
+        report_path = generator.generate_report("https://github.com/owner/repo/pull/5", _SINCE_DATE, [])
+        assert os.path.basename(report_path) == "docupr_repo_20230201_123000.md"
         
-        # Assert that the report file exists
-        self.assertTrue(os.path.exists(report_path))
+    def test_report_header(self, rendered_report):
+        """
+        Test the header and summary of the markdown report.
+        """
+        _, content = rendered_report
+        missing = set(_REPORT_HEADER) - set(_REPORT_HEADER_RE.findall(content))
+        assert not missing, missing
         
-        # Read the report content
-        with open(report_path, "r") as f:
-            content = f.read()
-            
-        # Assert that the report contains expected content
-        self.assertIn("# Documentation Update Report for https://github.com/owner/repo", content)
-        self.assertIn("Analyzing PRs since: 2023-01-01", content)
-        self.assertIn("Total PRs analyzed: 3", content)
-        self.assertIn("PRs with user-facing changes: 2", content)
-        self.assertIn("### Existing Documentation to Update", content)
-        self.assertIn("- docs/api.md", content)
-        self.assertIn("- docs/ui.md", content)
-        self.assertIn("### New Documentation to Create", content)
-        self.assertIn("- docs/new-feature.md", content)
-        self.assertIn("### Suggested Content Updates", content)
-        self.assertIn("- PR #1: Add section on new authentication flow", content)
-        self.assertIn("- PR #3: Update screenshots in UI documentation", content)
-        self.assertIn("### PR #1: Add new feature", content)
-        self.assertIn("### PR #3: Update UI", content)
-        self.assertNotIn("### PR #2: Fix bug", content)  # Non-user-facing PR should not be included
+    def test_report_sections(self, rendered_report):
+        """
+        Test the documentation sections of the markdown report.
+        """
+        _, content = rendered_report
+        missing = set(_REPORT_SECTIONS) - set(_REPORT_SECTIONS_RE.findall(content))
+        assert not missing, missing
         
-    def test_generate_report_no_user_facing(self):
+    def test_report_excludes_non_user_facing(self, rendered_report):
         """
-        Test generating a report with no user-facing changes.
+        Test that non-user-facing PRs are left out of the markdown report.
         """
-        # Create analysis results with no user-facing changes
-        analysis_results = [
-            {
-                "pr_number": 1,
-                "pr_title": "Fix bug",
-                "pr_url": "https://github.com/owner/repo/pull/1",
-                "user_facing": False,
-                "docs_impact": {
-                    "update_existing": [],
-                    "create_new": [],
-                    "suggested_content": []
-                },
-                "reasoning": "This PR fixes an internal bug with no user-facing changes"
-            }
-        ]
+        _, content = rendered_report
+        present = _REPORT_FORBIDDEN_RE.findall(content)
+        assert not present, present
         
+    def test_generate_report_no_user_facing(self, generator):
+        """
+        Test generating a report with no user-facing changes.
+        """
         # Generate the report
-        report_path = self.generator.generate_report(
-            self.repo_url,
-            self.since_date,
-            analysis_results
+        report_path = generator.generate_report(
+            _REPO_URL,
+            _SINCE_DATE,
+            _NO_USER_FACING_RESULTS
         )
         
         # Assert that the report file exists
-        self.assertTrue(os.path.exists(report_path))
+        assert os.path.exists(report_path)
         
         # Read the report content
         with open(report_path, "r") as f:
             content = f.read()
             
         # Assert that the report contains expected content
-        self.assertIn("# Documentation Update Report for https://github.com/owner/repo", content)
-        self.assertIn("Total PRs analyzed: 1", content)
-        self.assertIn("PRs with user-facing changes: 0", content)
-        self.assertIn("No user-facing changes detected in the analyzed PRs.", content)
-        self.assertNotIn("### Existing Documentation to Update", content)
-        self.assertNotIn("### New Documentation to Create", content)
-        self.assertNotIn("### Suggested Content Updates", content)
+        missing = set(_NO_USER_FACING_REQUIRED) - set(_NO_USER_FACING_REQUIRED_RE.findall(content))
+        assert not missing, missing
+        
+        # Assert that no documentation sections were rendered
+        present = _NO_USER_FACING_FORBIDDEN_RE.findall(content)
+        assert not present, present
         
-    def test_generate_json_report(self):
+    def test_generate_json_report(self, generator):
         """
         Test generating a JSON report.
         """
         # Generate the report
-        report_path = self.generator.generate_json_report(
-            self.repo_url,
-            self.since_date,
-            self.analysis_results
+        report_path = generator.generate_json_report(
+            _REPO_URL,
+            _SINCE_DATE,
+            _ANALYSIS_RESULTS
         )
         
         # Assert that the report file exists
-        self.assertTrue(os.path.exists(report_path))
+        assert os.path.exists(report_path)
         
         # Read the report content
-        with open(report_path, "r") as f:
-            content = json.load(f)
+        with open(report_path, "rb") as f:
+            content = orjson.loads(f.read())
             
         # Assert that the report contains expected content
-        self.assertEqual(content["repository"], self.repo_url)
-        self.assertEqual(content["total_prs"], 3)
-        self.assertEqual(content["user_facing_prs"], 2)
-        self.assertEqual(len(content["analysis_results"]), 3)
-        self.assertEqual(content["analysis_results"][0]["pr_number"], 1)
-        self.assertEqual(content["analysis_results"][1]["pr_number"], 2)
-        self.assertEqual(content["analysis_results"][2]["pr_number"], 3)
-
-
-if __name__ == "__main__":
-    unittest.main()
+        assert content["repository"] == _REPO_URL
+        assert content["generated_at"] == "2023-02-01T12:30:00"
+        assert content["total_prs"] == 3
+        assert content["user_facing_prs"] == 2
+        assert len(content["analysis_results"]) == 3
+        assert content["analysis_results"][0]["pr_number"] == 1
+        assert content["analysis_results"][1]["pr_number"] == 2
+        assert content["analysis_results"][2]["pr_number"] == 3
+        assert content["analysis_results"][0]["docs_impact"]["update_existing"] == ["docs/api.md"]
+        assert "error" not in content["analysis_results"][0]